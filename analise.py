@@ -0,0 +1,550 @@
+import hashlib
+import re
+from collections import Counter
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from calendario import dias_uteis_por_mes, eh_dia_util
+from ingestao import NOMES_SEMANA
+
+# Cálculos do dashboard (métricas, períodos, dados dos gráficos e dos relatórios), sem
+# dependência do Streamlit: usados pelo app e pela linha de comando (cli.py)
+
+# Cores da IGA
+CORES_IGA = {
+    'laranja': '#FF6A13',
+    'azul_escuro': '#00285D',
+    'azul_claro': '#009DDC',
+    'branco': '#FFFFFF',
+    'cinza_claro': '#F5F6FA',
+    'cinza': '#A7A9AC'
+}
+
+# Filtros de notificação (botões do topo) -> valor da coluna 'Notificado'
+FILTROS_NOTIFICACAO = {
+    'Todos': None,
+    'Notificados': 'sim',
+    'Não Notificados': 'não'
+}
+
+# Quantidade de visitas no mês a partir da qual um visitante é considerado frequente
+LIMIAR_VISITAS_FREQUENTES = 4
+
+METRICAS = [
+    'total_convites',
+    'anfitrioes_notificados',
+    'anfitrioes_nao_notificados',
+    'total_convidados_cubo',
+    'total_convidados_residentes',
+    'media_convidados_dia_util'
+]
+
+TITULO_RELATORIO = 'Dashboard de Visitas - Cubo Itaú'
+
+# Layout próprio de cada gráfico; o visual comum fica no template 'iga' (figuras.template_iga).
+# 'nome' também é o título do slide no relatório em PPTX
+GRAFICOS = {
+    'top_empresas': {
+        'nome': 'Top 10 Empresas que Receberam Convidados',
+        'titulo_html': True,
+        'cor': CORES_IGA['azul_escuro'],
+        'rotulos': ('Empresa', 'Convites'),
+        'layout': dict(height=440, xaxis=dict(tickangle=0))
+    },
+    'por_data': {
+        'nome': 'Convidados por Dia',
+        'titulo_html': True,
+        'cor': CORES_IGA['laranja'],
+        'rotulos': ('Dia', 'Convidados'),
+        'layout': dict(height=440, xaxis=dict(type='category', tickangle=0, dtick=1))
+    },
+    # Dias de um intervalo que atravessa meses (rótulos dia/mês, espaçados automaticamente)
+    'por_intervalo': {
+        'nome': 'Convidados por Dia',
+        'titulo_html': True,
+        'cor': CORES_IGA['laranja'],
+        'rotulos': ('Dia', 'Convidados'),
+        'layout': dict(height=440, xaxis=dict(type='category', tickangle=-45))
+    },
+    'por_dia_semana': {
+        'nome': 'Convidados por Dia da Semana',
+        'titulo_html': True,
+        'cor': CORES_IGA['azul_escuro'],
+        'rotulos': ('Dia da Semana', 'Convidados'),
+        'layout': dict()
+    },
+    'consolidado': {
+        'nome': 'Empresas por quantidade de visitantes frequentes',
+        'titulo_html': False,
+        'cor': CORES_IGA['azul_escuro'],
+        'rotulos': ('Quantidade de Empresas', 'Visitantes'),
+        'layout': dict(
+            height=300,
+            title=dict(x=0.05, xanchor='left', font=dict(size=17)),
+            xaxis=dict(title='Quantidade de Empresas')
+        )
+    },
+    'tendencia': {
+        'nome': 'Evolução do indicador',
+        'titulo_html': False,
+        'cor': CORES_IGA['laranja'],
+        'rotulos': ('Mês', 'Valor'),
+        'layout': dict(
+            height=400,
+            title=dict(x=0.05, xanchor='left', font=dict(size=17)),
+            xaxis=dict(type='category', tickangle=0)
+        )
+    }
+}
+
+# Indicadores da visão de tendência (mês a mês): rótulo exibido -> coluna do resumo
+METRICAS_TENDENCIA = {
+    'Total de Convites': 'total_convites',
+    'Anfitriões Notificados': 'anfitrioes_notificados',
+    'Convidados Cubo': 'total_convidados_cubo',
+    'Convidados Residentes': 'total_convidados_residentes',
+    'Média por Dia Útil': 'media_convidados_dia_util'
+}
+
+# Colunas das linhas ordenadas por data (construir_indice_datas): as usadas pelas seções que
+# recebem as linhas filtradas (visitantes frequentes, resumo da empresa e relatório)
+COLUNAS_INTERVALO = ['Data do Convite', 'Notificado', 'Cliente', 'E-mail']
+
+# =====================
+# Colunas categóricas (Cliente, E-mail): contagens sobre os códigos inteiros
+# =====================
+def codigos_categoria(serie):
+    # Códigos inteiros (-1 para vazios) e dicionário de valores (categorias) da coluna
+    categorica = serie if isinstance(serie.dtype, pd.CategoricalDtype) else serie.astype('category')
+    return categorica.cat.codes.to_numpy(), categorica.cat.categories
+
+def eh_cliente_cubo(clientes):
+    # Cliente segregado (878 - Cubo): o texto é comparado só nas categorias e expandido pelos
+    # códigos; o False final atende o código -1 (vazio)
+    codigos, categorias = codigos_categoria(clientes)
+    return np.append(np.asarray(categorias.str.lower() == 'cubo'), False)[codigos]
+
+# =====================
+# Cubo diário: convites por (Ano, Mês, Notificado, Data, Cliente), montado uma vez por conjunto de dados
+# =====================
+def construir_cubo(df):
+    # Gráficos e indicadores saem de fatias desta tabela, cujo tamanho depende de dias x empresas,
+    # e não da quantidade de convites. A ordem é a de ordenar_dados: o índice de períodos
+    # (construir_indice_periodos) também vale para o cubo
+    colunas = [col for col in ['Ano', 'Mês', 'Notificado', 'Data do Convite', 'Cliente'] if col in df.columns]
+    return df.groupby(colunas, observed=True, dropna=False).size().rename('Convites').reset_index()
+
+def mesclar_cubos(cubos, df, indice):
+    # cubos: cubo de cada parte mesclada por mesclar_partes (ex.: os dados anteriores e um arquivo
+    # novo). Um mês presente em uma única parte mantém as contagens já calculadas; um mês presente
+    # em várias é recalculado a partir das linhas mescladas, já sem as repetições entre arquivos
+    meses = [set(cubo[['Ano', 'Mês']].drop_duplicates().itertuples(index=False, name=None)) for cubo in cubos]
+    repetidos = sorted(mes for mes, total in Counter(mes for parte in meses for mes in parte).items() if total > 1)
+    partes = []
+    for cubo in cubos:
+        if repetidos:
+            cubo = cubo[~pd.MultiIndex.from_frame(cubo[['Ano', 'Mês']]).isin(repetidos)]
+        partes.append(cubo)
+    partes += [construir_cubo(fatia_periodo(df, indice, ano, mes)) for ano, mes in repetidos]
+    # Mesmas categorias do DataFrame mesclado: ordem e desempates iguais aos de construir_cubo(df).
+    # A grafia de uma empresa pode ter sido unificada com a de outra parte (unificar_grafias)
+    categoricas = [col for col in ['Notificado', 'Cliente'] if col in df.columns]
+    grafias = {col: dict(zip(df[col].cat.categories.str.casefold(), df[col].cat.categories)) for col in categoricas}
+    partes = [
+        parte.assign(**{
+            col: parte[col].cat.rename_categories(lambda valor, col=col: grafias[col].get(valor.casefold(), valor))
+            .cat.set_categories(df[col].cat.categories)
+            for col in categoricas
+        })
+        for parte in partes
+    ]
+    colunas = [col for col in ['Ano', 'Mês', 'Notificado', 'Data do Convite', 'Cliente'] if col in df.columns]
+    return pd.concat(partes, ignore_index=True).sort_values(colunas, kind='stable').reset_index(drop=True)
+
+# =====================
+# Resumo de métricas: todos os indicadores em uma única agregação
+# =====================
+def calcular_resumo_metricas(cubo):
+    if 'Notificado' in cubo.columns:
+        notificado = cubo['Notificado'].astype(object).fillna('')
+    else:
+        notificado = pd.Series('', index=cubo.index)
+    base = pd.DataFrame({
+        'Ano': cubo['Ano'],
+        'Mês': cubo['Mês'],
+        'Notificado': notificado,
+        'Data': cubo['Data do Convite'],
+        'convites': cubo['Convites'],
+        'cubo': cubo['Convites'].where(eh_cliente_cubo(cubo['Cliente']), 0)
+    })
+    # Contagens por dia e situação de notificação, somando as empresas do cubo
+    diario = base.groupby(['Ano', 'Mês', 'Notificado', 'Data']).agg(
+        total=('convites', 'sum'),
+        cubo=('cubo', 'sum')
+    ).reset_index()
+    diario['dia_util'] = eh_dia_util(diario['Data'])
+    diario['notificados'] = diario['total'].where(diario['Notificado'] == 'sim', 0)
+    diario['nao_notificados'] = diario['total'].where(diario['Notificado'] == 'não', 0)
+    diario['convites_dia_util'] = diario['total'].where(diario['dia_util'], 0)
+
+    # Dias úteis de cada mês pelo calendário (feriados excluídos), os mesmos para todos os filtros
+    dias_uteis = dias_uteis_por_mes(cubo['Data do Convite'].min(), cubo['Data do Convite'].max())
+
+    # Os demais cálculos usam apenas a tabela diária, que é pequena
+    partes = []
+    for filtro, valor in FILTROS_NOTIFICACAO.items():
+        sub = diario if valor is None else diario[diario['Notificado'] == valor]
+        agregado = sub.groupby(['Ano', 'Mês']).agg(
+            total_convites=('total', 'sum'),
+            anfitrioes_notificados=('notificados', 'sum'),
+            anfitrioes_nao_notificados=('nao_notificados', 'sum'),
+            total_convidados_cubo=('cubo', 'sum'),
+            convites_dia_util=('convites_dia_util', 'sum')
+        )
+        agregado['dias_uteis'] = dias_uteis.reindex(agregado.index, fill_value=0).to_numpy()
+        agregado['Filtro'] = filtro
+        partes.append(agregado.reset_index())
+    resumo = pd.concat(partes, ignore_index=True).set_index(['Ano', 'Mês', 'Filtro']).sort_index()
+    resumo['total_convidados_residentes'] = resumo['total_convites'] - resumo['total_convidados_cubo']
+    dias = resumo['dias_uteis'].where(resumo['dias_uteis'] > 0)
+    resumo['media_convidados_dia_util'] = np.round(resumo['convites_dia_util'] / dias, 0).fillna(0).astype(int)
+    return resumo
+
+def metricas_periodo(resumo, ano, mes, filtro='Todos'):
+    try:
+        linha = resumo.loc[(ano, mes, filtro)]
+    except KeyError:
+        return {metrica: 0 for metrica in METRICAS}
+    return {metrica: int(linha[metrica]) for metrica in METRICAS}
+
+def metricas_intervalo(cubo, dias_uteis):
+    # Indicadores de um intervalo de datas (fatia do cubo já filtrada): o intervalo pode
+    # atravessar meses e por isso não é lido do resumo mensal. dias_uteis: dias úteis do
+    # intervalo cobertos pelos dados, como nos meses do resumo
+    convites = cubo['Convites']
+    total = int(convites.sum())
+    total_cubo = int(convites[eh_cliente_cubo(cubo['Cliente'])].sum())
+    convites_dia_util = int(convites[eh_dia_util(cubo['Data do Convite'])].sum())
+    if 'Notificado' in cubo.columns:
+        notificados = int(convites[cubo['Notificado'] == 'sim'].sum())
+        nao_notificados = int(convites[cubo['Notificado'] == 'não'].sum())
+    else:
+        notificados = nao_notificados = 0
+    return {
+        'total_convites': total,
+        'anfitrioes_notificados': notificados,
+        'anfitrioes_nao_notificados': nao_notificados,
+        'total_convidados_cubo': total_cubo,
+        'total_convidados_residentes': total - total_cubo,
+        'media_convidados_dia_util': int(round(convites_dia_util / dias_uteis)) if dias_uteis else 0
+    }
+
+# =====================
+# Tendência: indicadores mês a mês, com as variações mensal e anual, lidos do resumo
+# =====================
+def serie_tendencia(resumo, filtro='Todos'):
+    # Uma linha por mês, do primeiro ao último, com uma coluna por rótulo de
+    # METRICAS_TENDENCIA; meses sem convites ficam zerados
+    if filtro not in resumo.index.get_level_values('Filtro'):
+        return pd.DataFrame(columns=list(METRICAS_TENDENCIA))
+    serie = resumo.xs(filtro, level='Filtro')[list(METRICAS_TENDENCIA.values())]
+    serie.columns = list(METRICAS_TENDENCIA)
+    serie.index = pd.PeriodIndex([pd.Period(year=int(ano), month=int(mes), freq='M') for ano, mes in serie.index])
+    return serie.reindex(pd.period_range(serie.index.min(), serie.index.max(), freq='M'), fill_value=0)
+
+def variacao_percentual(valores, meses):
+    # Sem valor quando o mês de comparação não existe ou não teve convites
+    anterior = valores.shift(meses)
+    return ((valores - anterior) / anterior.where(anterior != 0) * 100).round(1)
+
+def tabela_tendencia(serie, metrica):
+    tabela = pd.DataFrame({
+        'Mês': serie.index.strftime('%m/%Y'),
+        metrica: serie[metrica].to_numpy(),
+        'Variação mensal (%)': variacao_percentual(serie[metrica], 1).to_numpy(),
+        'Variação anual (%)': variacao_percentual(serie[metrica], 12).to_numpy()
+    })
+    # Mês mais recente primeiro
+    return tabela.iloc[::-1].reset_index(drop=True)
+
+def dados_tendencia(serie, metrica):
+    return tuple(serie.index.strftime('%m/%Y')), tuple(int(v) for v in serie[metrica])
+
+# =====================
+# Índice de períodos: intervalos de linhas por (Ano, Mês) e por filtro de notificação
+# =====================
+def construir_indice_periodos(df):
+    # Depende da ordenação feita em preprocessar_dados; cada grupo é um intervalo [inicio, fim)
+    indice = {}
+    for (ano, mes), posicoes in df.groupby(['Ano', 'Mês'], sort=False).indices.items():
+        indice[(ano, mes, 'Todos')] = (int(posicoes[0]), int(posicoes[-1]) + 1)
+    if 'Notificado' in df.columns:
+        filtros = {valor: filtro for filtro, valor in FILTROS_NOTIFICACAO.items() if valor is not None}
+        grupos = df.groupby(['Ano', 'Mês', 'Notificado'], observed=True, sort=False).indices
+        for (ano, mes, valor), posicoes in grupos.items():
+            if valor in filtros:
+                indice[(ano, mes, filtros[valor])] = (int(posicoes[0]), int(posicoes[-1]) + 1)
+    return indice
+
+def periodos_disponiveis(indice):
+    anos = sorted({ano for ano, _, _ in indice}, reverse=True)
+    meses = sorted({mes for _, mes, _ in indice})
+    return anos, meses
+
+def fatia_periodo(df, indice, ano, mes, filtro='Todos'):
+    # Busca O(1) no índice; iloc sobre intervalo contíguo não copia os dados
+    inicio, fim = indice.get((ano, mes, filtro), (0, 0))
+    return df.iloc[inicio:fim]
+
+# =====================
+# Índice de datas: intervalos de datas quaisquer (dias ou semanas), resolvidos por busca binária
+# =====================
+def construir_indice_datas(df, colunas=None):
+    # Visões ordenadas por data: uma com todas as linhas e outra por (Notificado, data), em que
+    # cada filtro de notificação é um bloco contíguo. O intervalo de datas de um filtro passa a
+    # ser um intervalo de linhas de uma das visões: {filtro: (visão, datas ordenadas)}
+    if colunas is not None:
+        df = df[[col for col in colunas if col in df.columns]]
+    por_data = df.sort_values('Data do Convite', kind='stable')
+    indice = {'Todos': (por_data, por_data['Data do Convite'].to_numpy())}
+    if 'Notificado' in df.columns:
+        por_filtro = por_data.sort_values('Notificado', kind='stable')
+        blocos = por_filtro.groupby('Notificado', observed=True, sort=False).indices
+        for filtro, valor in FILTROS_NOTIFICACAO.items():
+            if valor in blocos:
+                visao = por_filtro.iloc[blocos[valor][0]:blocos[valor][-1] + 1]
+                indice[filtro] = (visao, visao['Data do Convite'].to_numpy())
+    return indice
+
+def fatia_datas(indice_datas, inicio, fim, filtro='Todos'):
+    # Busca binária nas datas ordenadas (inicio e fim inclusive); iloc sobre o intervalo
+    # encontrado não copia os dados
+    if filtro not in indice_datas:
+        return indice_datas['Todos'][0].iloc[0:0]
+    visao, datas = indice_datas[filtro]
+    primeira = np.searchsorted(datas, pd.Timestamp(inicio).to_datetime64(), side='left')
+    ultima = np.searchsorted(datas, pd.Timestamp(fim).to_datetime64(), side='right')
+    return visao.iloc[primeira:ultima]
+
+def limites_datas(indice_datas):
+    datas = indice_datas['Todos'][1]
+    return pd.Timestamp(datas[0]), pd.Timestamp(datas[-1])
+
+def semanas_do_intervalo(primeira, ultima):
+    # Segundas-feiras das semanas (de segunda a domingo) com alguma data no intervalo
+    return pd.date_range(primeira - pd.Timedelta(days=primeira.weekday()), ultima, freq='W-MON')
+
+def rotulo_semana(segunda):
+    return f'Semana de {segunda:%d/%m/%Y}'
+
+def rotulo_periodo(periodo):
+    # periodo: (ano, mês) ou (data inicial, data final) de um intervalo
+    if not isinstance(periodo[0], date):
+        ano, mes = periodo
+        return f'{mes:02d}/{ano}'
+    inicio, fim = periodo
+    if inicio == fim:
+        return f'{inicio:%d/%m/%Y}'
+    return f'{inicio:%d/%m/%Y} a {fim:%d/%m/%Y}'
+
+def dias_do_periodo(periodo):
+    if not isinstance(periodo[0], date):
+        ano, mes = periodo
+        return dias_do_mes(date(int(ano), int(mes), 1))
+    return pd.date_range(*periodo)
+
+# =====================
+# Dados dos gráficos: tuplas (x, y), usadas tanto pelas figuras quanto pelos relatórios; no
+# gráfico por dia, (x, y, dias úteis). Recebem uma fatia do cubo diário (período, filtro e,
+# no detalhe, empresa)
+# =====================
+def dados_top_empresas(cubo):
+    # Soma por código de Cliente, com todas as categorias e na ordem delas: o desempate entre
+    # empresas com o mesmo total fica igual ao do value_counts sobre as linhas
+    clientes, empresas = codigos_categoria(cubo['Cliente'])
+    validos = clientes >= 0
+    soma = np.bincount(clientes[validos], weights=cubo['Convites'].to_numpy()[validos], minlength=len(empresas))
+    convites = pd.Series(soma.astype(np.int64), index=empresas.astype(str))
+    convites = convites.where(~convites.index.str.lower().str.contains('cubo'), 0)
+    top_empresas = convites.sort_values(ascending=False)
+    top_empresas = top_empresas[top_empresas > 0].head(10)
+    return tuple(top_empresas.index.astype(str)), tuple(int(v) for v in top_empresas.values)
+
+def dados_convidados_por_data(cubo, dias=None):
+    # Todos os dias do período (dias_do_periodo), inclusive os sem convites; sem período,
+    # os dias do mês da primeira data. Terceiro elemento: se cada dia é útil
+    if dias is None:
+        dias = dias_do_mes(cubo['Data do Convite'].min())
+    por_data = cubo.groupby('Data do Convite')['Convites'].sum().reindex(dias, fill_value=0)
+    return rotulos_dias(dias), tuple(int(v) for v in por_data.values), tuple(bool(v) for v in eh_dia_util(dias))
+
+def dias_do_mes(data):
+    dias_no_mes = pd.Period(f'{data.year}-{data.month:02d}').days_in_month
+    return pd.date_range(start=f'{data.year}-{data.month:02d}-01', periods=dias_no_mes)
+
+def rotulos_dias(dias):
+    # Dia do mês quando o período cabe em um mês; dia/mês quando atravessa meses
+    if (dias[0].year, dias[0].month) == (dias[-1].year, dias[-1].month):
+        return tuple(str(dia) for dia in dias.day)
+    return tuple(dias.strftime('%d/%m'))
+
+def dados_convidados_por_dia_semana(cubo):
+    por_dia = cubo.groupby(cubo['Data do Convite'].dt.dayofweek)['Convites'].sum()
+    por_dia = por_dia.reindex(range(len(NOMES_SEMANA)), fill_value=0)
+    return tuple(NOMES_SEMANA), tuple(int(v) for v in por_dia.values)
+
+def dados_por_empresa(cubo_periodo, dias=None):
+    # Gráficos por dia e por dia da semana de todas as empresas do período, a partir de uma
+    # única matriz (empresa x dia): {empresa: (por_data, por_dia_semana)}
+    if cubo_periodo.empty:
+        return {}
+    if dias is None:
+        dias = dias_do_mes(cubo_periodo['Data do Convite'].min())
+    # Matriz montada pelos códigos: linha = empresa presente no período, coluna = dia
+    clientes, empresas = codigos_categoria(cubo_periodo['Cliente'])
+    colunas = dias.get_indexer(cubo_periodo['Data do Convite'])
+    validos = clientes >= 0
+    presentes, linhas = np.unique(clientes[validos], return_inverse=True)
+    no_periodo = colunas[validos] >= 0
+    posicoes = linhas[no_periodo] * len(dias) + colunas[validos][no_periodo]
+    convites = cubo_periodo['Convites'].to_numpy()[validos][no_periodo]
+    matriz = np.bincount(posicoes, weights=convites, minlength=len(presentes) * len(dias))
+    matriz = matriz.astype(np.int64).reshape(len(presentes), len(dias))
+    semana = matriz @ np.eye(len(NOMES_SEMANA), dtype=np.int64)[dias.dayofweek]
+    rotulos = rotulos_dias(dias)
+    uteis = tuple(bool(v) for v in eh_dia_util(dias))
+    return {
+        str(empresa): (
+            (rotulos, tuple(int(v) for v in por_data), uteis),
+            (tuple(NOMES_SEMANA), tuple(int(v) for v in por_dia_semana))
+        )
+        for empresa, por_data, por_dia_semana in zip(empresas[presentes], matriz, semana)
+    }
+
+def dados_detalhe_empresa(por_empresa, empresa):
+    # por_empresa: resultado de dados_por_empresa. Empresa sem convites no período
+    # (ex.: selecionada em outro mês): sem gráfico por dia e dias da semana zerados
+    return por_empresa.get(empresa, (None, (tuple(NOMES_SEMANA), (0,) * len(NOMES_SEMANA))))
+
+# =====================
+# Visitantes Frequentes por Empresa (>4 visitas no mês)
+# =====================
+def calcular_visitantes_frequentes(df, limiar=LIMIAR_VISITAS_FREQUENTES):
+    # Uma única contagem por (Cliente, E-mail), sobre uma chave inteira formada pelos dois
+    # códigos, sem laços em Python e sem comparar textos
+    clientes, empresas = codigos_categoria(df['Cliente'])
+    emails, enderecos = codigos_categoria(df['E-mail'])
+    validos = (clientes >= 0) & (emails >= 0)
+    chaves, visitas = np.unique(clientes[validos].astype(np.int64) * len(enderecos) + emails[validos], return_counts=True)
+    frequentes = visitas > limiar
+    cliente, email = np.divmod(chaves[frequentes], max(len(enderecos), 1))
+    df_tabela = pd.DataFrame({
+        'Empresa': empresas.take(cliente).astype(str).to_numpy(),
+        'E-mail': enderecos.take(email).astype(str).to_numpy(),
+        'Visitas': visitas[frequentes]
+    })
+    if not df_tabela.empty:
+        df_tabela = df_tabela.sort_values('Visitas', ascending=False, kind='stable')
+    return df_tabela
+
+def tabela_consolidado(frequentes):
+    # frequentes: tabela de calcular_visitantes_frequentes
+    if frequentes.empty:
+        return pd.DataFrame(columns=['Quantidade de Empresas', 'Ocorrências'])
+    # Conta quantas empresas tiveram X visitantes frequentes
+    ocorrencias = frequentes.groupby('Empresa').size().value_counts().sort_index()
+    return pd.DataFrame({
+        'Ocorrências': ocorrencias.index,
+        'Quantidade de Empresas': ocorrencias.values
+    })
+
+def dados_consolidado(frequentes):
+    if frequentes.empty:
+        return None
+    ocorrencias = frequentes.groupby('Empresa').size().value_counts().sort_index()
+    return tuple(f"{i} visitantes" for i in ocorrencias.index), tuple(int(v) for v in ocorrencias.values)
+
+# =====================
+# Relatórios: argumentos de relatorio.gerar_pptx para cada visualização
+# =====================
+def graficos_relatorio(cubo_filtro, cubo_detalhe, frequentes):
+    # Os mesmos gráficos da tela: top empresas e consolidado pelo filtro,
+    # dia e dia da semana pela empresa selecionada (quando houver)
+    return montar_graficos(
+        dados_top_empresas(cubo_filtro),
+        dados_convidados_por_data(cubo_detalhe) if not cubo_detalhe.empty else None,
+        dados_convidados_por_dia_semana(cubo_detalhe),
+        dados_consolidado(frequentes)
+    )
+
+def montar_graficos(top_empresas, por_data, por_dia_semana, consolidado):
+    graficos = [('top_empresas', top_empresas), ('por_data', por_data), ('por_dia_semana', por_dia_semana), ('consolidado', consolidado)]
+    return [
+        {
+            'titulo': GRAFICOS[tipo]['nome'],
+            'cor': GRAFICOS[tipo]['cor'],
+            'cores': cores_barras(GRAFICOS[tipo]['cor'], dados[2]) if len(dados) > 2 else None,
+            'horizontal': tipo == 'consolidado',
+            'x': dados[0],
+            'y': dados[1]
+        }
+        for tipo, dados in graficos if dados is not None
+    ]
+
+def cores_barras(cor, uteis):
+    # Gráfico por dia: fins de semana e feriados em cinza
+    return tuple(cor if util else CORES_IGA['cinza'] for util in uteis)
+
+def subtitulo_relatorio(periodo, filtro, empresa):
+    partes = [rotulo_periodo(periodo), filtro]
+    if empresa:
+        partes.append(empresa)
+    return ' · '.join(partes)
+
+def especificacoes_lote(df, indice, cubo, indice_cubo, resumo, filtro, limiar=LIMIAR_VISITAS_FREQUENTES):
+    # Um deck por mês e por empresa residente, iguais aos gerados pela tela. Os gráficos do mês
+    # são calculados uma vez e compartilhados pelos decks das empresas, sem filtrar o DataFrame por deck
+    especificacoes = []
+    for (ano, mes, filtro_indice), (inicio, fim) in sorted(indice.items()):
+        if filtro_indice != filtro or inicio == fim:
+            continue
+        df_mes = df.iloc[inicio:fim]
+        cubo_mes = fatia_periodo(cubo, indice_cubo, ano, mes, filtro)
+        metricas = metricas_periodo(resumo, ano, mes, filtro)
+        frequentes = calcular_visitantes_frequentes(df_mes[['Cliente', 'E-mail']], limiar)
+        top_empresas = dados_top_empresas(cubo_mes)
+        consolidado = dados_consolidado(frequentes)
+        pasta = f'{ano}-{mes:02d}'
+        usados = {f'{pasta}_todas_empresas'.lower()}
+        especificacoes.append((f'{pasta}/{pasta}_todas_empresas.pptx', (
+            TITULO_RELATORIO,
+            subtitulo_relatorio((ano, mes), filtro, None),
+            metricas,
+            graficos_relatorio(cubo_mes, cubo_mes, frequentes)
+        )))
+        for empresa, (por_data, por_dia_semana) in dados_por_empresa(cubo_mes).items():
+            # Empresas residentes: o próprio Cubo fica de fora, como no top empresas
+            if 'cubo' in empresa.lower():
+                continue
+            nome = nome_unico(f'{pasta}_{nome_arquivo_empresa(empresa)}', empresa, usados)
+            especificacoes.append((f'{pasta}/{nome}.pptx', (
+                TITULO_RELATORIO,
+                subtitulo_relatorio((ano, mes), filtro, empresa),
+                metricas,
+                montar_graficos(top_empresas, por_data, por_dia_semana, consolidado)
+            )))
+    return especificacoes
+
+def nome_arquivo_empresa(empresa):
+    return re.sub(r'[^\w-]+', '_', empresa).strip('_') or 'empresa'
+
+def nome_unico(nome, empresa, usados):
+    # Empresas diferentes podem coincidir após a limpeza ('A&B Ltda' e 'A/B Ltda' -> A_B_Ltda) ou
+    # diferir só em maiúsculas; o sufixo com o hash do nome original, estável entre exportações,
+    # evita entradas repetidas no zip
+    if nome.lower() in usados:
+        nome = f"{nome}_{hashlib.sha1(empresa.encode('utf-8')).hexdigest()[:8]}"
+    usados.add(nome.lower())
+    return nome
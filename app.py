@@ -1,17 +1,70 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from io import StringIO
 from datetime import datetime
 import io
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
 from PIL import Image
 import base64
-from pptx.dml.color import RGBColor
 from streamlit_plotly_events import plotly_events
+import os
+import json
+import time
+import logging
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from analise import (
+    COLUNAS_INTERVALO,
+    CORES_IGA,
+    LIMIAR_VISITAS_FREQUENTES,
+    METRICAS_TENDENCIA,
+    TITULO_RELATORIO,
+    calcular_resumo_metricas,
+    calcular_visitantes_frequentes,
+    construir_cubo,
+    construir_indice_datas,
+    construir_indice_periodos,
+    dados_consolidado,
+    dados_convidados_por_data,
+    dados_convidados_por_dia_semana,
+    dados_detalhe_empresa,
+    dados_por_empresa,
+    dados_tendencia,
+    dados_top_empresas,
+    dias_do_periodo,
+    especificacoes_lote,
+    fatia_datas,
+    fatia_periodo,
+    limites_datas,
+    mesclar_cubos,
+    metricas_intervalo,
+    metricas_periodo,
+    montar_graficos,
+    nome_arquivo_empresa,
+    periodos_disponiveis,
+    rotulo_periodo,
+    rotulo_semana,
+    semanas_do_intervalo,
+    serie_tendencia,
+    subtitulo_relatorio,
+    tabela_consolidado,
+    tabela_tendencia
+)
+from calendario import contar_dias_uteis
+from figuras import grafico_sem_dados, montar_figura, titulo_html
+from ingestao import detectar_formato, mesclar_partes
+from relatorio import GeradorRelatorios, exportar_zip, gerar_pptx
+from repositorio import RepositorioDados
+from snapshots import (
+    chave_arquivo,
+    chave_lote,
+    chave_snapshot,
+    ler_com_snapshots,
+    ler_snapshot,
+    salvar_snapshot,
+    snapshots_disponiveis
+)
 
 # Configurações do Streamlit para permitir upload de arquivos
 st.set_option('deprecation.showfileUploaderEncoding', False)
@@ -23,14 +76,215 @@ st.set_page_config(
     initial_sidebar_state='collapsed'
 )
 
-# Cores da IGA
-CORES_IGA = {
-    'laranja': '#FF6A13',
-    'azul_escuro': '#00285D',
-    'azul_claro': '#009DDC',
-    'branco': '#FFFFFF',
-    'cinza_claro': '#F5F6FA'
-}
+# Instrumentação de tempos por etapa: ativada com DASH_INSTRUMENTACAO=1 ou ?debug=1 na URL
+logger = logging.getLogger('dashboard_cubo')
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+# Quantidade de conjuntos de dados processados mantidos em memória (LRU)
+MAX_ARQUIVOS_CACHE = 8
+
+# Processos usados para ler arquivos (e abas ou faixas de linhas de um mesmo arquivo) em paralelo;
+# o mesmo pool gera os decks da exportação em lote
+MAX_PROCESSOS_LEITURA = min(4, os.cpu_count() or 1)
+
+# Relatórios PPTX prontos mantidos em memória, por período, filtro e empresa
+MAX_RELATORIOS_CACHE = 32
+
+# Espera máxima (s) pelo relatório da visualização, gerado em décimos de segundo, antes de seguir
+# com a página; a exportação em lote nunca é esperada
+ESPERA_RELATORIO = 2
+
+# Fragmentos (Streamlit 1.33+): a seção é executada de novo sozinha quando um widget dela muda.
+# Na versão fixada em requirements.txt (1.31) não há fragmentos: a função é chamada normalmente,
+# e cada clique executa o script inteiro, que por isso evita todo trabalho repetido (hash do
+# upload memorizado, cubo e índices compartilhados sem cópia, seções abertas sob demanda)
+fragmento = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda funcao: funcao)
+
+# Seções de visitantes frequentes, calculadas apenas quando abertas
+SECOES_FREQUENTES = ['Visitantes Frequentes', 'Consolidado', 'Painel']
+
+# Tipos de período da barra lateral; fora do mês, o período é um intervalo de datas
+TIPOS_PERIODO = ['Mês', 'Intervalo de datas', 'Semanas']
+
+# =====================
+# Repositório compartilhado: cada conteúdo fica uma única vez na memória do servidor,
+# e a sessão guarda só uma referência a ele
+# =====================
+@st.cache_resource(show_spinner=False)
+def repositorio_dados():
+    return RepositorioDados(MAX_ARQUIVOS_CACHE)
+
+def dados_sessao():
+    return st.session_state.get('dados')
+
+def chave_sessao():
+    referencia = dados_sessao()
+    return referencia.chave if referencia is not None else None
+
+def usar_dados(referencia, arquivos):
+    # Substituir a referência anterior a libera; o conjunto antigo continua em memória
+    # (para outras sessões ou uma nova carga) até ser descartado pelo LRU do repositório
+    st.session_state['dados'] = referencia
+    st.session_state['df_arquivos'] = arquivos
+    return referencia.df
+
+# =====================
+# Cache de leitura: cada arquivo é lido e pré-processado uma única vez
+# =====================
+def chave_upload(arquivo, formato):
+    # Toda interação executa o script de novo: o hash de um arquivo enviado é calculado uma
+    # única vez, e não a cada clique, memorizado pelo identificador do upload (file_id).
+    # Dados colados (BytesIO) não têm identificador e são sempre lidos pelo hash
+    identificador = getattr(arquivo, 'file_id', None)
+    if identificador is None:
+        return chave_arquivo(arquivo, formato)
+    chaves = st.session_state.setdefault('chaves_uploads', {})
+    if (identificador, formato) not in chaves:
+        chaves[(identificador, formato)] = chave_arquivo(arquivo, formato)
+    return chaves[(identificador, formato)]
+
+def carregar_com_cache(arquivo, formato):
+    with medir_etapa('hash do conteúdo'):
+        chave = chave_upload(arquivo, formato)
+    # Mesmo conteúdo da execução anterior: reaproveita os dados da sessão
+    if chave_sessao() == chave:
+        return dados_sessao().df
+    with medir_etapa('leitura e pré-processamento'), st.spinner('Processando dados...'):
+        # Conteúdo já aberto por outra sessão: apenas uma nova referência, sem ler nem copiar
+        referencia = repositorio_dados().carregar(chave, lambda: ler_dados_preprocessados(arquivo, chave, formato))
+    return usar_dados(referencia, [chave])
+
+# =====================
+# Leitura em paralelo: abas e faixas de linhas de todos os arquivos dividem o mesmo pool
+# =====================
+@st.cache_resource(show_spinner=False)
+def pool_leitura():
+    # 'spawn' porque o servidor do Streamlit usa várias threads, e fork nesse cenário não é seguro
+    return ProcessPoolExecutor(
+        max_workers=MAX_PROCESSOS_LEITURA,
+        mp_context=multiprocessing.get_context('spawn')
+    )
+
+def ler_arquivos(itens):
+    # Arquivos já processados antes (mesmo após reiniciar o servidor) são reconhecidos
+    # pelo hash e lidos do snapshot; apenas os novos passam pelo pool
+    try:
+        return ler_com_snapshots(itens, pool_leitura(), MAX_PROCESSOS_LEITURA)
+    except BrokenProcessPool:
+        # Um processo morreu (ex.: falta de memória): a próxima tentativa cria um pool novo
+        pool_leitura.clear()
+        raise
+
+def ler_dados_preprocessados(arquivo, chave, formato):
+    return ler_arquivos([(chave, arquivo, formato)])[0]
+
+# =====================
+# Vários arquivos: leitura em paralelo e mesclagem incremental
+# =====================
+def carregar_varios_arquivos(arquivos):
+    with medir_etapa('hash do conteúdo'):
+        itens = {}
+        for arquivo in arquivos:
+            formato = detectar_formato(arquivo)
+            itens.setdefault(chave_upload(arquivo, formato), (arquivo, formato))
+    chaves = sorted(itens)
+    chave = chave_lote(chaves)
+    if chave_sessao() == chave:
+        return dados_sessao().df
+
+    def montar_lote():
+        df = ler_snapshot(chave)
+        if df is not None:
+            return df
+        # Incremental: se os dados da sessão vieram de parte destes arquivos,
+        # só os arquivos novos são lidos e mesclados a eles
+        anteriores = st.session_state.get('df_arquivos', [])
+        if dados_sessao() is not None and anteriores and set(anteriores) <= set(chaves):
+            partes = [dados_sessao().df]
+            cubos = [cubo_do_conjunto(dados_sessao().df, chave_sessao())[0]]
+            novos = [chave for chave in chaves if chave not in anteriores]
+        else:
+            partes = []
+            cubos = []
+            novos = chaves
+        with medir_etapa('leitura dos arquivos'):
+            partes_novas = ler_arquivos([(chave,) + itens[chave] for chave in novos])
+        with medir_etapa('mesclagem'):
+            df = mesclar_partes(partes + partes_novas)
+        # Cubo incremental: os meses já agregados nos dados anteriores não são recalculados
+        with medir_etapa('cubo incremental'):
+            cubos += [construir_cubo(parte) for parte in partes_novas]
+            st.session_state['cubo_incremental'] = (chave, mesclar_cubos(cubos, df, construir_indice_periodos(df)))
+        salvar_snapshot(df, chave)
+        return df
+
+    with st.spinner('Processando dados...'):
+        referencia = repositorio_dados().carregar(chave, montar_lote)
+    return usar_dados(referencia, chaves)
+
+# =====================
+# Instrumentação: tempo de cada etapa da execução, exibido em um painel de debug
+# =====================
+def instrumentacao_ativa():
+    return st.session_state.get('instrumentacao', False)
+
+def iniciar_instrumentacao():
+    ativa = os.environ.get('DASH_INSTRUMENTACAO') == '1' or st.query_params.get('debug') == '1'
+    st.session_state['instrumentacao'] = ativa
+    st.session_state['tempos_etapas'] = []
+    st.session_state['etapas_abertas'] = []
+    st.session_state['inicio_execucao'] = time.perf_counter()
+
+@contextmanager
+def medir_etapa(nome):
+    if not instrumentacao_ativa():
+        yield
+        return
+    abertas = st.session_state['etapas_abertas']
+    abertas.append(nome)
+    etapa = ' › '.join(abertas)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        abertas.pop()
+        st.session_state['tempos_etapas'].append({
+            'Etapa': etapa,
+            'Início (ms)': round((inicio - st.session_state['inicio_execucao']) * 1000, 1),
+            'Duração (ms)': round((time.perf_counter() - inicio) * 1000, 1)
+        })
+
+def finalizar_instrumentacao():
+    if not instrumentacao_ativa():
+        return
+    total = round((time.perf_counter() - st.session_state['inicio_execucao']) * 1000, 1)
+    tempos = sorted(st.session_state['tempos_etapas'], key=lambda tempo: tempo['Início (ms)'])
+    with st.expander('⏱️ Tempos de execução por etapa (debug)'):
+        st.caption(f'Total da execução: {total} ms')
+        if tempos:
+            st.dataframe(pd.DataFrame(tempos), use_container_width=True, hide_index=True)
+    # Uma linha JSON por execução, para agregação nos logs
+    logger.info(json.dumps({
+        'evento': 'tempos_execucao',
+        'arquivo': chave_sessao(),
+        'total_ms': total,
+        'etapas': {tempo['Etapa']: tempo['Duração (ms)'] for tempo in tempos}
+    }, ensure_ascii=False))
+
+# =====================
+# Snapshots em disco: formato colunar para reabrir os dados sem ler o Excel
+# =====================
+def reabrir_ultimo_snapshot():
+    arquivos = snapshots_disponiveis()
+    if not arquivos:
+        return None
+    chave = chave_snapshot(arquivos[0])
+    referencia = repositorio_dados().carregar(chave, lambda: ler_snapshot(chave))
+    if referencia is None:
+        return None
+    return usar_dados(referencia, [chave])
 
 # =====================
 # Função para carregar e pré-processar os dados
@@ -38,260 +292,205 @@ CORES_IGA = {
 def carregar_dados():
     st.sidebar.header('Carregar Dados')
     
-    # Configuração do file_uploader com todos os tipos de Excel
-    uploaded_file = st.sidebar.file_uploader(
-        'Faça upload do arquivo Excel',
+    # Configuração do file_uploader com todos os tipos de Excel; vários arquivos
+    # (ex.: um por mês) são mesclados em um único conjunto de dados
+    uploaded_files = st.sidebar.file_uploader(
+        'Faça upload dos arquivos Excel',
         type=['xlsx', 'xls', 'xlsm', 'xlsb'],
-        accept_multiple_files=False,
-        help='Formatos aceitos: .xlsx, .xls, .xlsm, .xlsb'
+        accept_multiple_files=True,
+        help='Formatos aceitos: .xlsx, .xls, .xlsm, .xlsb. Vários arquivos podem ser enviados de uma vez.'
     )
     
     df = None
-    if uploaded_file is not None:
+    if uploaded_files:
         try:
-            # Detecta o tipo de arquivo
-            file_type = uploaded_file.name.split('.')[-1].lower()
-            
-            if file_type == 'xls':
-                # Para arquivos Excel 97-2003
-                df = pd.read_excel(uploaded_file, engine='xlrd')
+            if len(uploaded_files) == 1:
+                df = carregar_com_cache(uploaded_files[0], detectar_formato(uploaded_files[0]))
+                st.sidebar.success('Arquivo carregado com sucesso!')
             else:
-                # Para outros formatos
-                try:
-                    df = pd.read_excel(uploaded_file, engine='openpyxl')
-                except:
-                    df = pd.read_excel(uploaded_file, engine='xlrd')
-            st.sidebar.success('Arquivo carregado com sucesso!')
-            # Salva o DataFrame no session_state
-            st.session_state['df'] = df.copy()
+                df = carregar_varios_arquivos(uploaded_files)
+                st.sidebar.success(f'{len(uploaded_files)} arquivos carregados com sucesso!')
         except Exception as e:
             st.sidebar.error(f'Erro ao ler o arquivo: {str(e)}')
             st.sidebar.info('Dica: Se o arquivo for Excel 97-2003 (.xls), tente salvá-lo como Excel 2007 ou superior (.xlsx)')
             return None
     else:
+        # Reabre o último conjunto de dados processado (ex.: após reiniciar o servidor)
+        if dados_sessao() is None and snapshots_disponiveis():
+            if st.sidebar.button('Reabrir último conjunto de dados'):
+                df = reabrir_ultimo_snapshot()
+                if df is not None:
+                    st.sidebar.success('Dados reabertos com sucesso!')
         st.sidebar.write('Ou cole os dados da planilha (Ctrl+V)')
         clipboard_data = st.sidebar.text_area('Cole aqui os dados copiados da planilha')
         if clipboard_data:
             try:
-                df = pd.read_csv(StringIO(clipboard_data), sep='\t')
+                df = carregar_com_cache(io.BytesIO(clipboard_data.encode('utf-8')), 'csv')
                 st.sidebar.success('Dados colados com sucesso!')
-                st.session_state['df'] = df.copy()
             except Exception as e:
                 st.sidebar.error(f'Erro ao ler os dados colados: {str(e)}')
                 return None
     
-    # Se não carregou nada agora, tenta recuperar do session_state
-    if df is None and 'df' in st.session_state:
-        df = st.session_state['df']
+    # Se não carregou nada agora, usa os dados referenciados pela sessão
+    # (já pré-processados e compartilhados pelo repositório)
+    if df is None and dados_sessao() is not None:
+        df = dados_sessao().df
     
-    if df is not None:
-        df = preprocessar_dados(df)
     return df
 
 # =====================
-# Função de pré-processamento
+# Cubo diário: convites por dia, empresa e notificação, de onde saem os gráficos e indicadores
 # =====================
-def preprocessar_dados(df):
-    # Limpeza da coluna Cliente
-    if 'Cliente' in df.columns:
-        df['Cliente'] = df['Cliente'].astype(str).str.replace(r'^\d+\s*-\s*', '', regex=True).str.strip()
-    
-    # Extrair apenas a data da coluna 'Data do Convite' (ex: '30/04/2025 (18:00 às 19:00)' -> '30/04/2025')
-    if 'Data do Convite' in df.columns:
-        df['Data do Convite'] = df['Data do Convite'].astype(str).str.extract(r'(\d{2}/\d{2}/\d{4})')[0]
-    
-    # Conversão de datas
-    for col in ['Data de Cadastro', 'Data do Convite']:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-    
-    # Remover linhas com datas inválidas
-    df = df.dropna(subset=['Data do Convite'])
-    
-    # Extrair dia da semana, mês, ano da Data do Convite
-    if 'Data do Convite' in df.columns:
-        # Garantir que o dia da semana é calculado pela data
-        df['Dia da Semana'] = df['Data do Convite'].dt.dayofweek
-        nomes_semana = ['Segunda','Terça','Quarta','Quinta','Sexta','Sábado','Domingo']
-        df['Dia da Semana Nome'] = df['Dia da Semana'].apply(lambda x: nomes_semana[x] if pd.notnull(x) else '')
-        df['Ano'] = df['Data do Convite'].dt.year
-        df['Mês'] = df['Data do Convite'].dt.month
-        df['Dia'] = df['Data do Convite'].dt.day
-    
-    return df
+@st.cache_resource(max_entries=MAX_ARQUIVOS_CACHE, show_spinner=False)
+def cubo_diario(_df, chave, _cubo=None):
+    # _df e _cubo não entram no hash do cache; a chave identifica o conjunto de dados.
+    # _cubo: cubo já montado de forma incremental na mesclagem de arquivos.
+    # Compartilhado entre execuções (sem cópia a cada clique) e não deve ser alterado
+    return montar_cubo(_df, _cubo)
+
+def montar_cubo(df, cubo=None):
+    if cubo is None:
+        cubo = construir_cubo(df)
+    return cubo, construir_indice_periodos(cubo)
+
+def cubo_do_conjunto(df, chave):
+    if not chave:
+        return montar_cubo(df)
+    incremental = st.session_state.pop('cubo_incremental', None)
+    cubo = incremental[1] if incremental is not None and incremental[0] == chave else None
+    return cubo_diario(df, chave, cubo)
 
 # =====================
-# Funções para métricas
+# Resumo de métricas: todos os indicadores em uma única agregação
 # =====================
-def total_convites(df):
-    return len(df)
+@st.cache_resource(max_entries=MAX_ARQUIVOS_CACHE, show_spinner=False)
+def resumo_metricas(_cubo, chave):
+    # _cubo não entra no hash do cache; a chave identifica o conjunto de dados.
+    # Compartilhado entre execuções e não deve ser alterado
+    return calcular_resumo_metricas(_cubo)
 
-def anfitrioes_notificados(df):
-    return df[df['Anfitrião Notificado'].str.lower() == 'sim'].shape[0]
+# =====================
+# Índice de períodos: intervalos de linhas por (Ano, Mês) e por filtro de notificação
+# =====================
+@st.cache_resource(max_entries=MAX_ARQUIVOS_CACHE, show_spinner=False)
+def indice_periodos(_df, chave):
+    # _df não entra no hash do cache; a chave identifica o conjunto de dados.
+    # Compartilhado entre execuções e não deve ser alterado
+    return construir_indice_periodos(_df)
 
-def anfitrioes_nao_notificados(df):
-    return df[df['Anfitrião Notificado'].str.lower() == 'não'].shape[0]
+# =====================
+# Índice de datas: linhas e cubo ordenados por data, para intervalos de datas e de semanas
+# =====================
+@st.cache_resource(max_entries=2 * MAX_ARQUIVOS_CACHE, show_spinner=False)
+def indice_datas(_df, chave, colunas=None):
+    # _df não entra no hash do cache; chave = (dados, 'linhas' ou 'cubo'). As visões são
+    # compartilhadas entre execuções e não devem ser alteradas
+    return construir_indice_datas(_df, colunas)
+
+def indices_datas(df, cubo, chave):
+    if not chave:
+        return construir_indice_datas(df, COLUNAS_INTERVALO), construir_indice_datas(cubo)
+    return indice_datas(df, (chave, 'linhas'), COLUNAS_INTERVALO), indice_datas(cubo, (chave, 'cubo'))
+
+def selecionar_intervalo(tipo_periodo, primeira, ultima):
+    # Datas inicial e final (inclusive) escolhidas na barra lateral
+    if tipo_periodo == 'Intervalo de datas':
+        datas = st.sidebar.date_input(
+            'Datas',
+            value=(primeira.date(), ultima.date()),
+            min_value=primeira.date(),
+            max_value=ultima.date(),
+            format='DD/MM/YYYY',
+            key='intervalo_datas'
+        )
+        # Enquanto a data final não é escolhida, o intervalo é apenas a data inicial
+        datas = tuple(datas) or (primeira, ultima)
+        return pd.Timestamp(datas[0]), pd.Timestamp(datas[-1])
+    # Semanas de segunda a domingo; por padrão, a última semana com convites
+    semanas = {rotulo_semana(segunda): segunda for segunda in semanas_do_intervalo(primeira, ultima)}
+    rotulos = list(semanas)
+    inicio, fim = st.sidebar.select_slider('Semanas', rotulos, value=(rotulos[-1], rotulos[-1]), key='intervalo_semanas')
+    return semanas[inicio], semanas[fim] + pd.Timedelta(days=6)
 
-def total_convidados_cubo(df):
-    # Cliente segregado: 878 - Cubo
-    return df[df['Cliente'].str.lower() == 'cubo'].shape[0]
+# =====================
+# Funções para gráficos
+# =====================
+@st.cache_resource(max_entries=64, show_spinner=False)
+def figura_barras(tipo, x, y, uteis=None):
+    # Figuras memorizadas pelos dados: um gráfico que não mudou não é montado de novo.
+    # A figura é compartilhada entre execuções e não deve ser alterada depois de criada.
+    return montar_figura(tipo, x, y, uteis)
+
+# Os dados de cada gráfico são tuplas (x, y), usadas tanto pelas figuras quanto pelo relatório,
+# calculadas sobre uma fatia do cubo diário; no gráfico por dia, (x, y, dias úteis)
+def grafico_top_empresas(cubo):
+    return figura_barras('top_empresas', *dados_top_empresas(cubo))
+
+def grafico_convidados_por_data(cubo):
+    if cubo.empty:
+        return grafico_sem_dados('Sem dados para exibir')
+    data_inicio = cubo['Data do Convite'].min()
+    data_fim = cubo['Data do Convite'].max()
+    if pd.isna(data_inicio) or pd.isna(data_fim):
+        return grafico_sem_dados('Datas inválidas')
+    return figura_barras('por_data', *dados_convidados_por_data(cubo))
 
-def total_convidados_residentes(df):
-    return len(df) - total_convidados_cubo(df)
+def grafico_convidados_por_dia_semana(cubo):
+    return figura_barras('por_dia_semana', *dados_convidados_por_dia_semana(cubo))
 
-def media_convidados_dia_util(df):
-    dias_uteis = df[df['Data do Convite'].dt.weekday < 5]['Data do Convite'].dt.date.nunique()
-    if dias_uteis == 0:
-        return 0
-    return int(round(len(df[df['Data do Convite'].dt.weekday < 5]) / dias_uteis, 0))
+def grafico_detalhe_por_data(por_data):
+    if por_data is None:
+        return grafico_sem_dados('Sem dados para exibir')
+    # Períodos que atravessam meses têm rótulos dia/mês, e não só o dia
+    tipo = 'por_data' if por_data[0][0].isdigit() else 'por_intervalo'
+    return figura_barras(tipo, *por_data)
 
 # =====================
-# Funções para gráficos
+# Detalhe por empresa: índice do período por Cliente, com os gráficos por dia e por dia da
+# semana de todas as empresas calculados uma única vez; selecionar (ou buscar) uma empresa é
+# apenas uma consulta, compartilhada pelos dois gráficos e pelo relatório
 # =====================
-def grafico_top_empresas(df):
-    df_empresas = df[~df['Cliente'].str.lower().str.contains('cubo')]
-    top_empresas = df_empresas['Cliente'].value_counts().head(10)
-    df_plot = pd.DataFrame({
-        'Empresa': top_empresas.index,
-        'Convites': top_empresas.values
-    })
-    fig = px.bar(
-        df_plot,
-        x='Empresa',
-        y='Convites',
-        title='Top 10 Empresas que Receberam Convidados',
-        color_discrete_sequence=[CORES_IGA['azul_escuro']]
-    )
-    fig.update_traces(text=df_plot['Convites'], textposition='outside')
-    fig.update_layout(
-        plot_bgcolor=CORES_IGA['cinza_claro'],
-        paper_bgcolor=CORES_IGA['cinza_claro'],
-        title_font_size=22,
-        title_font_family='Arial',
-        title_x=0.5,
-        margin=dict(t=60, b=40, l=40, r=40),
-        height=420,
-        xaxis=dict(tickangle=-30, automargin=True, title=None),
-        yaxis=dict(title=None)
-    )
-    return fig
-
-def grafico_convidados_por_data(df):
-    if df.empty:
-        return px.bar(title='Sem dados para exibir')
-    data_inicio = df['Data do Convite'].min()
-    data_fim = df['Data do Convite'].max()
-    if pd.isna(data_inicio) or pd.isna(data_fim):
-        return px.bar(title='Datas inválidas')
-    mes = data_inicio.month
-    ano = data_inicio.year
-    dias_no_mes = pd.Period(f'{ano}-{mes:02d}').days_in_month
-    dias_mes = pd.date_range(start=f'{ano}-{mes:02d}-01', end=f'{ano}-{mes:02d}-{dias_no_mes}')
-    por_data = df.groupby(df['Data do Convite'].dt.date).size()
-    por_data = por_data.reindex(dias_mes.date, fill_value=0)
-    df_plot = pd.DataFrame({
-        'Dia': [str(d.day) for d in por_data.index],
-        'Convidados': por_data.values
-    })
-    fig = px.bar(
-        df_plot,
-        x='Dia',
-        y='Convidados',
-        title='Convidados por Dia',
-        color_discrete_sequence=[CORES_IGA['laranja']]
-    )
-    fig.update_traces(text=df_plot['Convidados'], textposition='outside')
-    fig.update_xaxes(tickangle=0, dtick=1, tickmode='array', tickvals=[str(i) for i in range(1, dias_no_mes+1)], ticktext=[str(i) for i in range(1, dias_no_mes+1)], title=None)
-    fig.update_layout(
-        plot_bgcolor=CORES_IGA['cinza_claro'],
-        paper_bgcolor=CORES_IGA['cinza_claro'],
-        title_font_size=22,
-        title_font_family='Arial',
-        title_x=0.5,
-        margin=dict(t=60, b=40, l=40, r=40),
-        yaxis=dict(title=None)
-    )
-    return fig
-
-def grafico_convidados_por_dia_semana(df):
-    nomes_semana = ['Segunda','Terça','Quarta','Quinta','Sexta','Sábado','Domingo']
-    por_dia = df['Dia da Semana Nome'].value_counts().reindex(nomes_semana, fill_value=0)
-    df_plot = pd.DataFrame({
-        'Dia da Semana': nomes_semana,
-        'Convidados': por_dia.values
-    })
-    fig = px.bar(
-        df_plot,
-        x='Dia da Semana',
-        y='Convidados',
-        title='Convidados por Dia da Semana',
-        color_discrete_sequence=[CORES_IGA['azul_escuro']]
-    )
-    fig.update_traces(text=df_plot['Convidados'], textposition='outside')
-    fig.update_layout(
-        plot_bgcolor=CORES_IGA['cinza_claro'],
-        paper_bgcolor=CORES_IGA['cinza_claro'],
-        title_font_size=22,
-        title_font_family='Arial',
-        title_x=0.5,
-        margin=dict(t=60, b=40, l=40, r=40),
-        xaxis=dict(title=None),
-        yaxis=dict(title=None)
-    )
-    return fig
+@st.cache_resource(max_entries=64, show_spinner=False)
+def detalhe_empresas(_cubo_filtro, chave_periodo):
+    # _cubo_filtro não entra no hash do cache; chave_periodo = (dados, período, filtro).
+    # Compartilhado entre execuções e não deve ser alterado
+    return dados_por_empresa(_cubo_filtro, dias_do_periodo(chave_periodo[1]))
+
+def dados_detalhe(cubo_filtro, chave_periodo, empresa):
+    # (por_data, por_dia_semana) da empresa selecionada ou, sem seleção, do filtro inteiro;
+    # o gráfico por dia cobre todos os dias do período, mesmo quando atravessa meses
+    dias = dias_do_periodo(chave_periodo[1])
+    if not empresa:
+        por_data = dados_convidados_por_data(cubo_filtro, dias) if not cubo_filtro.empty else None
+        return por_data, dados_convidados_por_dia_semana(cubo_filtro)
+    por_empresa = detalhe_empresas(cubo_filtro, chave_periodo) if chave_periodo[0] else dados_por_empresa(cubo_filtro, dias)
+    return dados_detalhe_empresa(por_empresa, empresa)
 
 # =====================
 # Visitantes Frequentes por Empresa (>4 visitas no mês)
 # =====================
-def visitantes_frequentes(df):
-    tabela = []
-    for empresa, grupo in df.groupby('Cliente'):
-        visitantes = grupo.groupby('E-mail').size()
-        frequentes = visitantes[visitantes > 4]
-        if not frequentes.empty:
-            for email, qtd in frequentes.items():
-                tabela.append({'Empresa': empresa, 'E-mail': email, 'Visitas': qtd})
-    df_tabela = pd.DataFrame(tabela)
-    if not df_tabela.empty:
-        df_tabela = df_tabela.sort_values('Visitas', ascending=False)
-    return df_tabela
-
-def consolidado_frequentes(df):
-    tabela = visitantes_frequentes(df)
-    if tabela.empty:
-        return pd.DataFrame(columns=['Quantidade de Empresas', 'Ocorrências'])
-    # Conta quantas empresas tiveram X visitantes frequentes
-    ocorrencias = tabela.groupby('Empresa').size().value_counts().sort_index()
-    return pd.DataFrame({
-        'Ocorrências': ocorrencias.index,
-        'Quantidade de Empresas': ocorrencias.values
-    })
-
-def consolidado_frequentes_grafico(df):
-    tabela = visitantes_frequentes(df)
-    if tabela.empty:
+@st.cache_data(max_entries=64, show_spinner=False)
+def frequentes_em_cache(_df_filtro, chave_periodo, limiar):
+    # _df_filtro não entra no hash do cache; chave_periodo = (dados, período, filtro)
+    return calcular_visitantes_frequentes(_df_filtro, limiar)
+
+def visitantes_frequentes(df_filtro, chave_periodo, limiar=LIMIAR_VISITAS_FREQUENTES):
+    # Resultado compartilhado (via cache) pela tabela, consolidado, gráfico, painel e relatório
+    if not chave_periodo[0]:
+        return calcular_visitantes_frequentes(df_filtro, limiar)
+    return frequentes_em_cache(df_filtro, chave_periodo, limiar)
+
+def consolidado_frequentes(df_filtro, chave_periodo, limiar=LIMIAR_VISITAS_FREQUENTES):
+    return tabela_consolidado(visitantes_frequentes(df_filtro, chave_periodo, limiar))
+
+def consolidado_frequentes_grafico(df_filtro, chave_periodo, limiar=LIMIAR_VISITAS_FREQUENTES):
+    dados = dados_consolidado(visitantes_frequentes(df_filtro, chave_periodo, limiar))
+    if dados is None:
         return None
-    ocorrencias = tabela.groupby('Empresa').size().value_counts().sort_index()
-    fig = go.Figure(go.Bar(
-        x=ocorrencias.values,
-        y=[f"{i} visitantes" for i in ocorrencias.index],
-        orientation='h',
-        marker_color=CORES_IGA['azul_escuro'],
-        text=ocorrencias.values,
-        textposition='outside'
-    ))
-    fig.update_layout(
-        title='Empresas por quantidade de visitantes frequentes',
-        xaxis_title='Quantidade de Empresas',
-        yaxis_title='',
-        plot_bgcolor=CORES_IGA['cinza_claro'],
-        paper_bgcolor=CORES_IGA['cinza_claro'],
-        height=300
-    )
-    return fig
+    return figura_barras('consolidado', *dados)
 
-def painel_empresas_frequentes(df):
-    tabela = visitantes_frequentes(df)
+def painel_empresas_frequentes(df_filtro, chave_periodo, limiar=LIMIAR_VISITAS_FREQUENTES):
+    tabela = visitantes_frequentes(df_filtro, chave_periodo, limiar)
     if tabela.empty:
         return ''
     ocorrencias = tabela.groupby('Empresa').size()
@@ -302,46 +501,255 @@ def painel_empresas_frequentes(df):
         painel += f'<div style="margin-bottom:12px;"><b>{qtd} visitantes frequentes</b><br><span style="color:#003366">{empresas_str}</span></div>'
     return painel
 
-def gerar_pptx(df, df_filtro):
-    prs = Presentation()
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
-    left = Inches(0.2)
-    top = Inches(0.2)
-    width = Inches(2.2)
-    height = Inches(0.7)
-    azul_escuro = (0, 51, 102)  # RGB do Itaú
-    # Adiciona cards
-    for i, (label, value) in enumerate([
-        ("Total de Convites", total_convites(df)),
-        ("Anfitriões Notificados", anfitrioes_notificados(df)),
-        ("Não Notificados", anfitrioes_nao_notificados(df)),
-        ("Convidados Cubo", total_convidados_cubo(df)),
-        ("Média por Dia Útil", media_convidados_dia_util(df)),
-    ]):
-        txBox = slide.shapes.add_textbox(left + Inches(i*2.3), top, width, height)
-        tf = txBox.text_frame
-        tf.clear()
-        p = tf.paragraphs[0]
-        p.text = label
-        p.font.size = Pt(14)
-        p.font.bold = True
-        p.font.color.rgb = RGBColor(*azul_escuro)
-        p2 = tf.add_paragraph()
-        p2.text = str(value)
-        p2.font.size = Pt(28)
-        p2.font.bold = True
-        p2.font.color.rgb = RGBColor(*azul_escuro)
-        p2.alignment = PP_ALIGN.CENTER
-    # Adiciona título
-    titleBox = slide.shapes.add_textbox(Inches(0.2), Inches(1.2), Inches(10), Inches(0.7))
-    titleBox.text = 'Dashboard de Visitas - Cubo Itaú'
-    # Exporta slide para bytes
-    output = io.BytesIO()
-    prs.save(output)
-    output.seek(0)
-    return output
+# =====================
+# Relatório em PPTX: gerado em segundo plano e guardado por (dados, período, filtro, empresa)
+# =====================
+@st.cache_resource(show_spinner=False)
+def gerador_relatorios():
+    return GeradorRelatorios(MAX_RELATORIOS_CACHE)
+
+def pedir_relatorio(chave_relatorio, metricas, df_filtro, cubo_filtro, detalhe, subtitulo):
+    # Callback do botão: os dados dos gráficos (inclusive os visitantes frequentes) só são
+    # calculados quando o relatório é pedido, e o deck é gerado em segundo plano.
+    # chave_relatorio = (dados, período, filtro, empresa); detalhe: (por_data, por_dia_semana) já
+    # exibidos na tela
+    graficos = montar_graficos(
+        dados_top_empresas(cubo_filtro),
+        *detalhe,
+        dados_consolidado(visitantes_frequentes(df_filtro, chave_relatorio[:3]))
+    )
+    gerador_relatorios().pedir(chave_relatorio, gerar_pptx, TITULO_RELATORIO, subtitulo, metricas, graficos)
+
+def secao_relatorio(chave_relatorio, metricas, df_filtro, cubo_filtro, detalhe, subtitulo):
+    futuro = gerador_relatorios().obter(chave_relatorio)
+    if futuro is None:
+        # O pedido é feito no callback, antes da próxima execução: o relatório é gerado
+        # enquanto o restante do dashboard é desenhado
+        st.button(
+            'Gerar relatório em PPTX',
+            on_click=pedir_relatorio,
+            args=(chave_relatorio, metricas, df_filtro, cubo_filtro, detalhe, subtitulo)
+        )
+        return
+    exibir_download(futuro, 'Baixar relatório em PPTX', 'dashboard_cubo.pptx')
+
+def exibir_download(futuro, rotulo, nome_arquivo):
+    if not futuro.done():
+        with st.spinner('Gerando relatório...'):
+            wait([futuro], timeout=ESPERA_RELATORIO)
+    if not futuro.done():
+        st.info('Gerando relatório...')
+        st.button('Atualizar', key='atualizar_relatorio')
+        return
+    if exibir_erro(futuro):
+        return
+    st.download_button(rotulo, futuro.result(), file_name=nome_arquivo)
+
+def exibir_erro(futuro):
+    if futuro.exception() is None:
+        return False
+    if isinstance(futuro.exception(), BrokenProcessPool):
+        pool_leitura.clear()
+    st.error(f'Erro ao gerar o relatório: {futuro.exception()}')
+    return True
+
+# =====================
+# Exportação em lote: um deck por mês e por empresa residente, em um único zip gravado em disco.
+# Só o último lote pronto é mantido, e a página nunca espera a geração
+# =====================
+@st.cache_resource(show_spinner=False)
+def diretorio_lotes():
+    return tempfile.mkdtemp(prefix='dash_lotes_')
+
+@st.cache_resource(show_spinner=False)
+def gerador_lotes():
+    # O lote descartado (substituído por um novo) tem o zip removido do disco
+    return GeradorRelatorios(1, threads=1, ao_descartar=remover_arquivo)
+
+@st.cache_resource(show_spinner=False)
+def andamento_lotes():
+    # Decks gravados e total de cada lote, atualizados pela geração em segundo plano
+    return {}
+
+def remover_arquivo(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+def gerar_zip_lote(especificacoes, diretorio, pool, progresso):
+    # Executada em segundo plano; retorna o caminho do zip
+    descritor, caminho = tempfile.mkstemp(suffix='.zip', dir=diretorio)
+    os.close(descritor)
+    try:
+        exportar_zip(especificacoes, caminho, pool, MAX_PROCESSOS_LEITURA, progresso)
+    except BaseException:
+        remover_arquivo(caminho)
+        raise
+    return caminho
+
+def pedir_exportacao_lote(chave_lote, df, indice, cubo, indice_cubo, resumo, filtro):
+    # Callback do botão: as especificações são montadas aqui, e os decks, em segundo plano
+    especificacoes = especificacoes_lote(df, indice, cubo, indice_cubo, resumo, filtro)
+    andamento = andamento_lotes()
+    andamento[chave_lote] = (0, len(especificacoes))
+
+    def progresso(gravados, total):
+        andamento[chave_lote] = (gravados, total)
+
+    gerador_lotes().pedir(chave_lote, gerar_zip_lote, especificacoes, diretorio_lotes(), pool_leitura(), progresso)
+
+def preparar_download_lote(chave_lote):
+    st.session_state['download_lote'] = chave_lote
+
+def secao_exportacao_lote(chave, df, indice, cubo, indice_cubo, resumo, filtro):
+    chave_lote = ('lote', chave, filtro)
+    futuro = gerador_lotes().obter(chave_lote)
+    if futuro is None or not exibir_lote(futuro, chave_lote, filtro):
+        st.button(
+            'Exportar PPTX de todos os meses e empresas (ZIP)',
+            on_click=pedir_exportacao_lote,
+            args=(chave_lote, df, indice, cubo, indice_cubo, resumo, filtro),
+            help='Um relatório por mês e por empresa residente, com o filtro de notificação atual'
+        )
+
+def exibir_lote(futuro, chave_lote, filtro):
+    # Retorna False quando o zip não existe mais (lote substituído pelo de outra sessão)
+    if not futuro.done():
+        gravados, total = andamento_lotes().get(chave_lote, (0, 0))
+        st.progress(gravados / total if total else 0.0, text=f'Gerando relatórios: {gravados} de {total}')
+        st.button('Atualizar', key='atualizar_lote')
+        return True
+    if exibir_erro(futuro):
+        return True
+    try:
+        # O zip só é lido para o botão de download quando pedido: o st.download_button lê o
+        # conteúdo inteiro a cada execução enquanto está na página
+        if st.session_state.get('download_lote') != chave_lote:
+            tamanho = os.path.getsize(futuro.result()) / 1024 ** 2
+            st.button(f'Preparar download do ZIP ({tamanho:.0f} MB)', on_click=preparar_download_lote, args=(chave_lote,))
+            return True
+        with open(futuro.result(), 'rb') as arquivo:
+            nome_arquivo = f'relatorios_cubo_{nome_arquivo_empresa(filtro)}.zip'
+            if st.download_button('Baixar relatórios em ZIP', arquivo, file_name=nome_arquivo):
+                st.session_state['download_lote'] = None
+    except OSError:
+        return False
+    return True
+
+# =====================
+# Seções da página: os gráficos por empresa são um fragmento (Streamlit 1.33+), e as seções de
+# visitantes frequentes só são calculadas quando abertas
+# =====================
+@fragmento
+def secao_graficos_empresa(chave, periodo, filtro, metricas, df_filtro, cubo_filtro):
+    # Com fragmentos, um clique no top empresas executa de novo apenas esta seção
+    # (os cards e as seções abaixo não mudam com a empresa selecionada); sem eles, a execução
+    # completa não refaz nenhuma agregação. Os gráficos da empresa vêm do detalhe
+    # pré-calculado do período, sem filtrar o cubo
+    col1, col2 = st.columns(2, gap="medium")
+    if 'empresa_selecionada' not in st.session_state:
+        st.session_state['empresa_selecionada'] = None
+    with col1:
+        with medir_etapa('gráfico top empresas'):
+            fig_top_empresas = grafico_top_empresas(cubo_filtro)
+        with medir_etapa('componente plotly_events'):
+            selected = plotly_events(fig_top_empresas, click_event=True, select_event=False, hover_event=False, override_height=440, override_width=None)
+        if selected:
+            st.session_state['empresa_selecionada'] = selected[0]['x']
+    # Dia e dia da semana detalham a empresa selecionada (quando houver)
+    empresa = st.session_state['empresa_selecionada']
+    chave_periodo = (chave, periodo, filtro)
+    with medir_etapa('detalhe da empresa'):
+        detalhe = dados_detalhe(cubo_filtro, chave_periodo, empresa)
+    por_data, por_dia_semana = detalhe
+    with col2:
+        with medir_etapa('gráfico por dia'):
+            fig_data = grafico_detalhe_por_data(por_data)
+        st.plotly_chart(fig_data, use_container_width=True)
+
+    col1, col2 = st.columns(2, gap="medium")
+    with col1:
+        with medir_etapa('gráfico por dia da semana'):
+            fig_semana = figura_barras('por_dia_semana', *por_dia_semana)
+        st.plotly_chart(fig_semana, use_container_width=True)
+    with col2:
+        # Relatório em PPTX da visualização atual
+        with medir_etapa('relatório pptx'):
+            secao_relatorio(
+                (chave, periodo, filtro, empresa),
+                metricas,
+                df_filtro,
+                cubo_filtro,
+                detalhe,
+                subtitulo_relatorio(periodo, filtro, empresa)
+            )
+
+@fragmento
+def secao_visitantes_frequentes(df_filtro, chave_periodo):
+    st.markdown('---')
+    st.markdown('<div style="text-align:center;"><span style="font-family:Arial,sans-serif;font-size:26px;font-weight:bold;color:{};">Visitantes Frequentes por Empresa (&gt;{} visitas no mês)</span></div>'.format(CORES_IGA['azul_escuro'], LIMIAR_VISITAS_FREQUENTES), unsafe_allow_html=True)
+    # O conteúdo de st.tabs e st.expander é sempre executado; aqui só a seção escolhida é calculada
+    if not st.toggle('Mostrar visitantes frequentes', key='mostrar_frequentes'):
+        return
+    secao = st.radio('Seção', SECOES_FREQUENTES, horizontal=True, key='secao_frequentes', label_visibility='collapsed')
+    if secao == 'Visitantes Frequentes':
+        with medir_etapa('visitantes frequentes'):
+            tabela_frequentes = visitantes_frequentes(df_filtro, chave_periodo)
+        if not tabela_frequentes.empty:
+            st.dataframe(tabela_frequentes, height=370, use_container_width=True)
+        else:
+            st.info('Nenhum visitante frequente no período.')
+    elif secao == 'Consolidado':
+        st.subheader('Consolidado de Empresas com Visitantes Frequentes')
+        with medir_etapa('consolidado de frequentes'):
+            tabela_consolidado = consolidado_frequentes(df_filtro, chave_periodo)
+            fig_consolidado = consolidado_frequentes_grafico(df_filtro, chave_periodo)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.dataframe(tabela_consolidado, height=200)
+        with col2:
+            if fig_consolidado:
+                st.plotly_chart(fig_consolidado, use_container_width=True)
+    else:
+        st.subheader('Painel de Empresas com Visitantes Frequentes')
+        with medir_etapa('painel de frequentes'):
+            painel = painel_empresas_frequentes(df_filtro, chave_periodo)
+        st.markdown(painel, unsafe_allow_html=True)
+
+@fragmento
+def secao_tendencia(resumo, filtro):
+    st.markdown('---')
+    st.markdown('<div style="text-align:center;">{}</div>'.format(titulo_html('Tendência Mensal')), unsafe_allow_html=True)
+    if not st.toggle('Mostrar tendência mês a mês', key='mostrar_tendencia'):
+        return
+    metrica = st.radio(
+        'Indicador',
+        list(METRICAS_TENDENCIA),
+        horizontal=True,
+        key='metrica_tendencia',
+        label_visibility='collapsed'
+    )
+    # Série lida do resumo mensal, sem filtrar as linhas de cada mês
+    with medir_etapa('tendência mensal'):
+        serie = serie_tendencia(resumo, filtro)
+    if serie.empty:
+        st.info('Sem dados para o filtro selecionado.')
+        return
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        st.plotly_chart(figura_barras('tendencia', *dados_tendencia(serie, metrica)), use_container_width=True)
+    with col2:
+        st.dataframe(tabela_tendencia(serie, metrica), height=400, use_container_width=True, hide_index=True)
 
 def main():
+    iniciar_instrumentacao()
+    try:
+        renderizar_dashboard()
+    finally:
+        finalizar_instrumentacao()
+
+def renderizar_dashboard():
     st.markdown(f"""
         <style>
         .modern-card {{
@@ -414,7 +822,8 @@ def main():
 
     st.markdown('<div class="main-title modern-title">Dashboard de Visitas - Cubo Itaú</div>', unsafe_allow_html=True)
     
-    df = carregar_dados()
+    with medir_etapa('carregar_dados'):
+        df = carregar_dados()
     if df is None:
         st.info('Por favor, carregue um arquivo Excel ou cole os dados para iniciar a análise.')
         return
@@ -425,130 +834,82 @@ def main():
         st.error('Dados inválidos ou incompletos. Verifique se o arquivo contém as colunas necessárias.')
         return
 
-    anos = sorted(df['Ano'].dropna().unique(), reverse=True)
-    meses = sorted(df['Mês'].dropna().unique())
+    chave = chave_sessao()
+    with medir_etapa('índice de períodos'):
+        indice = indice_periodos(df, chave) if chave else construir_indice_periodos(df)
+    anos, meses = periodos_disponiveis(indice)
     if not anos or not meses:
         st.error('Não há dados de período disponíveis.')
         return
 
-    ano_sel = st.sidebar.selectbox('Ano', anos)
-    mes_sel = st.sidebar.selectbox('Mês', meses)
-    df_filtro = df[(df['Ano'] == ano_sel) & (df['Mês'] == mes_sel)]
-    if df_filtro.empty:
-        st.warning('Não há dados para o período selecionado.')
-        return
-
-    # Aplica o filtro
-    if st.session_state['filtro_notificado'] == 'Notificados':
-        df_filtro = df_filtro[df_filtro['Anfitrião Notificado'].str.lower() == 'sim']
-    elif st.session_state['filtro_notificado'] == 'Não Notificados':
-        df_filtro = df_filtro[df_filtro['Anfitrião Notificado'].str.lower() == 'não']
+    # Cubo diário do conjunto de dados, montado uma vez e reaproveitado a cada filtro
+    with medir_etapa('cubo diário'):
+        cubo, indice_cubo = cubo_do_conjunto(df, chave)
+    with medir_etapa('resumo de métricas'):
+        resumo = resumo_metricas(cubo, chave) if chave else calcular_resumo_metricas(cubo)
+
+    filtro = st.session_state['filtro_notificado']
+    tipo_periodo = st.sidebar.radio('Tipo de período', TIPOS_PERIODO, key='tipo_periodo')
+    if tipo_periodo == 'Mês':
+        ano_sel = st.sidebar.selectbox('Ano', anos)
+        mes_sel = st.sidebar.selectbox('Mês', meses)
+        if fatia_periodo(df, indice, ano_sel, mes_sel).empty:
+            st.warning('Não há dados para o período selecionado.')
+            return
+        periodo = (ano_sel, mes_sel)
+
+        # Aplica o filtro: linhas (visitantes frequentes) e cubo (gráficos)
+        with medir_etapa('filtro de período'):
+            df_filtro = fatia_periodo(df, indice, ano_sel, mes_sel, filtro)
+            cubo_filtro = fatia_periodo(cubo, indice_cubo, ano_sel, mes_sel, filtro)
+        # Métricas do mês e filtro selecionados, lidas do resumo pré-calculado
+        metricas = metricas_periodo(resumo, ano_sel, mes_sel, filtro)
+    else:
+        # Intervalos de datas e de semanas: busca binária nas linhas e no cubo ordenados por data
+        with medir_etapa('índice de datas'):
+            datas_linhas, datas_cubo = indices_datas(df, cubo, chave)
+        primeira, ultima = limites_datas(datas_cubo)
+        inicio, fim = selecionar_intervalo(tipo_periodo, primeira, ultima)
+        if fatia_datas(datas_cubo, inicio, fim).empty:
+            st.warning('Não há dados para o período selecionado.')
+            return
+        periodo = (inicio, fim)
+
+        with medir_etapa('filtro de período'):
+            df_filtro = fatia_datas(datas_linhas, inicio, fim, filtro)
+            cubo_filtro = fatia_datas(datas_cubo, inicio, fim, filtro)
+        with medir_etapa('métricas do intervalo'):
+            # Dias úteis do intervalo cobertos pelos dados, como nos meses do resumo
+            dias_uteis = contar_dias_uteis(max(inicio, primeira), min(fim, ultima))
+            metricas = metricas_intervalo(cubo_filtro, dias_uteis)
 
     # Cards em linha horizontal usando st.columns, igualmente espaçados
     col0, col1, col2, col3, col4, col5 = st.columns(6)
     with col0:
-        st.markdown(f'<div class="modern-card"><div class="card-label">Período</div><div class="big-number">{mes_sel:02d}/{ano_sel}</div></div>', unsafe_allow_html=True)
+        # Intervalos de datas têm um rótulo mais longo que o do mês
+        tamanho = '' if tipo_periodo == 'Mês' else ' style="font-size:1.2em;"'
+        st.markdown(f'<div class="modern-card"><div class="card-label">Período</div><div class="big-number"{tamanho}>{rotulo_periodo(periodo)}</div></div>', unsafe_allow_html=True)
     with col1:
-        st.markdown(f'<div class="modern-card"><div class="card-label">Total de Convites</div><div class="big-number">{total_convites(df)}</div></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="modern-card"><div class="card-label">Total de Convites</div><div class="big-number">{metricas["total_convites"]}</div></div>', unsafe_allow_html=True)
     with col2:
-        st.markdown(f'<div class="modern-card"><div class="card-label">Anfitriões Notificados</div><div class="big-number">{anfitrioes_notificados(df)}</div></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="modern-card"><div class="card-label">Anfitriões Notificados</div><div class="big-number">{metricas["anfitrioes_notificados"]}</div></div>', unsafe_allow_html=True)
     with col3:
-        st.markdown(f'<div class="modern-card"><div class="card-label">Não Notificados</div><div class="big-number">{anfitrioes_nao_notificados(df)}</div></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="modern-card"><div class="card-label">Não Notificados</div><div class="big-number">{metricas["anfitrioes_nao_notificados"]}</div></div>', unsafe_allow_html=True)
     with col4:
-        st.markdown(f'<div class="modern-card"><div class="card-label">Convidados Cubo</div><div class="big-number">{total_convidados_cubo(df)}</div></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="modern-card"><div class="card-label">Convidados Cubo</div><div class="big-number">{metricas["total_convidados_cubo"]}</div></div>', unsafe_allow_html=True)
     with col5:
-        st.markdown(f'<div class="modern-card"><div class="card-label">Média por Dia Útil</div><div class="big-number">{media_convidados_dia_util(df)}</div></div>', unsafe_allow_html=True)
-
-    # Primeira linha de gráficos (2 colunas)
-    col1, col2 = st.columns(2, gap="medium")
-    if 'empresa_selecionada' not in st.session_state:
-        st.session_state['empresa_selecionada'] = None
-    with col1:
-        fig_top_empresas = grafico_top_empresas(df_filtro)
-        fig_top_empresas.update_layout(
-            height=440,
-            width=None,
-            margin=dict(t=60, b=40, l=40, r=40),
-            title=dict(
-                text='<span style="font-family:Arial,sans-serif;font-size:26px;font-weight:bold;color:{};">Top 10 Empresas que Receberam Convidados</span>'.format(CORES_IGA['azul_escuro']),
-                x=0.5,
-                xanchor='center',
-                yanchor='top',
-                pad=dict(t=10, b=0)
-            ),
-            plot_bgcolor=CORES_IGA['cinza_claro'],
-            paper_bgcolor=CORES_IGA['cinza_claro'],
-            xaxis=dict(tickangle=0, automargin=True, title=None),
-        )
-        fig_top_empresas.update_xaxes(tickangle=0)
-        selected = plotly_events(fig_top_empresas, click_event=True, select_event=False, hover_event=False, override_height=440, override_width=None)
-        if selected:
-            st.session_state['empresa_selecionada'] = selected[0]['x']
-    with col2:
-        if st.session_state['empresa_selecionada']:
-            df_empresa = df_filtro[df_filtro['Cliente'] == st.session_state['empresa_selecionada']]
-            fig_data = grafico_convidados_por_data(df_empresa)
-        else:
-            fig_data = grafico_convidados_por_data(df_filtro)
-        fig_data.update_layout(
-            height=440,
-            width=None,
-            margin=dict(t=60, b=40, l=40, r=40),
-            title=dict(
-                text='<span style="font-family:Arial,sans-serif;font-size:26px;font-weight:bold;color:{};">Convidados por Dia</span>'.format(CORES_IGA['azul_escuro']),
-                x=0.5,
-                xanchor='center',
-                yanchor='top',
-                pad=dict(t=10, b=0)
-            ),
-            plot_bgcolor=CORES_IGA['cinza_claro'],
-            paper_bgcolor=CORES_IGA['cinza_claro'],
-        )
-        st.plotly_chart(fig_data, use_container_width=True)
+        st.markdown(f'<div class="modern-card"><div class="card-label">Média por Dia Útil</div><div class="big-number">{metricas["media_convidados_dia_util"]}</div></div>', unsafe_allow_html=True)
 
-    # Segunda linha de gráficos (2 colunas)
-    col1, col2 = st.columns(2, gap="medium")
-    with col1:
-        if st.session_state['empresa_selecionada']:
-            df_empresa = df_filtro[df_filtro['Cliente'] == st.session_state['empresa_selecionada']]
-            fig_semana = grafico_convidados_por_dia_semana(df_empresa)
-        else:
-            fig_semana = grafico_convidados_por_dia_semana(df_filtro)
-        fig_semana.update_layout(
-            title=dict(
-                text='<span style="font-family:Arial,sans-serif;font-size:26px;font-weight:bold;color:{};">Convidados por Dia da Semana</span>'.format(CORES_IGA['azul_escuro']),
-                x=0.5,
-                xanchor='center',
-                yanchor='top',
-                pad=dict(t=10, b=0)
-            ),
-            plot_bgcolor=CORES_IGA['cinza_claro'],
-            paper_bgcolor=CORES_IGA['cinza_claro'],
-        )
-        st.plotly_chart(fig_semana, use_container_width=True)
-    with col2:
-        st.markdown('<div style="text-align:center;"><span style="font-family:Arial,sans-serif;font-size:26px;font-weight:bold;color:{};">Visitantes Frequentes por Empresa (&gt;4 visitas no mês)</span></div>'.format(CORES_IGA['azul_escuro']), unsafe_allow_html=True)
-        tabela_frequentes = visitantes_frequentes(df_filtro)
-        if not tabela_frequentes.empty:
-            st.dataframe(tabela_frequentes, height=370, use_container_width=True)
+    # Gráficos que dependem da empresa selecionada, em um fragmento (Streamlit 1.33+)
+    with medir_etapa('gráficos por empresa'):
+        secao_graficos_empresa(chave, periodo, filtro, metricas, df_filtro, cubo_filtro)
 
-    # Terceira seção (consolidado e painel)
-    st.markdown('---')
-    col1, col2 = st.columns(2)
-    with col1:
-        st.subheader('Consolidado de Empresas com Visitantes Frequentes')
-        st.dataframe(consolidado_frequentes(df_filtro), height=200)
-        fig_consolidado = consolidado_frequentes_grafico(df_filtro)
-        if fig_consolidado:
-            st.plotly_chart(fig_consolidado, use_container_width=True)
-    with col2:
-        st.subheader('Painel de Empresas com Visitantes Frequentes')
-        st.markdown(painel_empresas_frequentes(df_filtro), unsafe_allow_html=True)
+    # Seções abaixo dos gráficos: calculadas apenas quando abertas
+    secao_visitantes_frequentes(df_filtro, (chave, periodo, filtro))
+    secao_tendencia(resumo, filtro)
 
-    # Botão para download em PPTX
-    if st.button('Baixar visualização em PPTX'):
-        pptx_bytes = gerar_pptx(df, df_filtro)
-        st.download_button('Clique aqui para baixar o PPTX', pptx_bytes, file_name='dashboard_cubo.pptx')
+    with medir_etapa('exportação em lote'):
+        secao_exportacao_lote(chave, df, indice, cubo, indice_cubo, resumo, filtro)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,225 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import analise
+import figuras
+import ingestao
+import relatorio
+import snapshots
+
+# Benchmark das etapas do dashboard sobre as funções sem dependência do Streamlit (nada de
+# caches do app: cada etapa é de fato executada nas duas medições, de tempo e de memória)
+
+# =====================
+# Gerador de dados sintéticos no formato da exportação de convites
+# =====================
+HORARIOS = ['(08:00 às 09:00)', '(09:00 às 12:00)', '(12:00 às 14:00)', '(14:00 às 18:00)', '(18:00 às 19:00)']
+
+def gerar_dados_sinteticos(linhas, ano=2025, semente=0):
+    rng = np.random.default_rng(semente)
+
+    # Empresas com popularidade desigual; o Cubo concentra uma fatia fixa dos convites
+    empresas = np.array(['878 - Cubo'] + [f'{1000 + i} - Empresa {i:03d}' for i in range(1, 400)])
+    pesos_empresas = 1 / np.arange(1, len(empresas) + 1) ** 0.8
+    pesos_empresas[0] = pesos_empresas[1:].sum() * 0.05
+    pesos_empresas /= pesos_empresas.sum()
+
+    # Poucos visitantes muito frequentes e muitos visitantes ocasionais
+    total_visitantes = max(linhas // 6, 50)
+    emails = np.array([f'visitante{i}@empresa{i % 97}.com.br' for i in range(total_visitantes)])
+    pesos_emails = 1 / np.arange(1, total_visitantes + 1) ** 1.1
+    pesos_emails /= pesos_emails.sum()
+
+    # Convites concentrados em dias úteis
+    dias = pd.date_range(f'{ano}-01-01', f'{ano}-12-31')
+    pesos_dias = np.where(dias.dayofweek < 5, 1.0, 0.1)
+    pesos_dias /= pesos_dias.sum()
+
+    datas = dias[rng.choice(len(dias), size=linhas, p=pesos_dias)]
+    cadastro = datas - pd.to_timedelta(rng.integers(0, 15, linhas), unit='D')
+    horarios = np.array(HORARIOS)[rng.integers(0, len(HORARIOS), linhas)]
+
+    return pd.DataFrame({
+        'Cliente': empresas[rng.choice(len(empresas), size=linhas, p=pesos_empresas)],
+        'Data do Convite': datas.strftime('%d/%m/%Y') + ' ' + horarios,
+        'Data de Cadastro': cadastro.strftime('%d/%m/%Y %H:%M'),
+        'Anfitrião Notificado': np.where(rng.random(linhas) < 0.7, 'Sim', 'Não'),
+        'E-mail': emails[rng.choice(total_visitantes, size=linhas, p=pesos_emails)],
+        'Nome': 'Visitante',
+        'Documento': rng.integers(10 ** 9, 10 ** 10, linhas).astype(str)
+    })
+
+def exportar_csv(df):
+    return io.BytesIO(df.to_csv(sep='\t', index=False).encode('utf-8'))
+
+def exportar_xlsx(df):
+    arquivo = io.BytesIO()
+    df.to_excel(arquivo, index=False, engine='openpyxl')
+    arquivo.seek(0)
+    return arquivo
+
+# =====================
+# Verificação da leitura por faixas
+# =====================
+# Faixas pedidas na verificação (ver dividir_leitura: cada faixa tem ao menos LINHAS_MIN_FAIXA linhas)
+FAIXAS_VERIFICACAO = 4
+
+def verificar_leitura_xlsx(arquivo, esperado):
+    # A leitura por faixas usa partes internas do openpyxl (WorkSheetParser, _get_source,
+    # _shared_strings): o resultado é comparado com o de ler_arquivo e com o da leitura pelo
+    # pandas, para que uma atualização do openpyxl não altere os dados sem aviso.
+    # Um pool de threads executa o mesmo caminho do pool de processos, dividindo o arquivo
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        por_faixas = ingestao.ler_em_paralelo([('verificacao', arquivo, 'openpyxl')], pool, FAIXAS_VERIFICACAO)['verificacao']
+    arquivo.seek(0)
+    pandas = ingestao.juntar_partes([ingestao.preprocessar_bloco(ingestao.ler_excel_completo(arquivo, 'openpyxl'))])
+    for leitura, df in [('leitura por faixas', por_faixas), ('leitura pelo pandas', pandas)]:
+        try:
+            pd.testing.assert_frame_equal(df, esperado, check_categorical=False)
+        except AssertionError as erro:
+            raise AssertionError(f'{leitura} difere de ler_arquivo ({len(esperado)} linhas):\n{erro}') from None
+
+# =====================
+# Medição de tempo e pico de memória por etapa
+# =====================
+def medir(funcao, medir_memoria=True):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    tempo = time.perf_counter() - inicio
+    pico = None
+    if medir_memoria:
+        # Execução separada: o tracemalloc deixa o código mais lento e distorceria o tempo
+        tracemalloc.start()
+        funcao()
+        pico = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+    return resultado, tempo, pico
+
+def executar_etapas(linhas, medir_memoria=True, max_linhas_excel=100000, pool=None, processos=1):
+    resultados = []
+
+    def registrar(etapa, funcao, memoria=True):
+        resultado, tempo, pico = medir(funcao, medir_memoria and memoria)
+        resultados.append({'linhas': linhas, 'etapa': etapa, 'tempo_s': tempo, 'pico_mb': pico})
+        return resultado
+
+    bruto = gerar_dados_sinteticos(linhas)
+
+    # Leituras no próprio processo, para que o pico de memória inclua todo o trabalho
+    arquivo_csv = exportar_csv(bruto)
+    registrar('leitura csv', lambda: ingestao.ler_arquivo(arquivo_csv, 'csv'))
+    if linhas <= max_linhas_excel:
+        arquivo_xlsx = exportar_xlsx(bruto)
+        df_xlsx = registrar('leitura xlsx', lambda: ingestao.ler_arquivo(arquivo_xlsx, 'openpyxl'))
+        verificar_leitura_xlsx(arquivo_xlsx, df_xlsx)
+        if pool is not None and processos > 1:
+            # Só o tempo: a memória dos processos de leitura não é vista pelo tracemalloc
+            itens = [('benchmark:openpyxl', arquivo_xlsx, 'openpyxl')]
+            registrar('leitura xlsx paralela', lambda: ingestao.ler_em_paralelo(itens, pool, processos), memoria=False)
+
+    df = registrar('preprocessamento', lambda: ingestao.preprocessar_dados(bruto.copy()))
+    chave = f'benchmark{linhas}:csv:v{ingestao.VERSAO_PREPROCESSAMENTO}'
+    registrar('gravar snapshot', lambda: snapshots.salvar_snapshot(df, chave))
+    registrar('ler snapshot', lambda: snapshots.ler_snapshot(chave))
+    cubo = registrar('cubo diário', lambda: analise.construir_cubo(df))
+    indice_cubo = analise.construir_indice_periodos(cubo)
+    resumo = registrar('resumo de métricas', lambda: analise.calcular_resumo_metricas(cubo))
+    indice = registrar('índice de períodos', lambda: analise.construir_indice_periodos(df))
+    registrar('índice de datas', lambda: analise.construir_indice_datas(df, analise.COLUNAS_INTERVALO))
+
+    # Etapas por período usam o mês com mais convites
+    ano, mes, _ = max(indice, key=lambda chave: indice[chave][1] - indice[chave][0])
+    df_mes = analise.fatia_periodo(df, indice, ano, mes)
+    cubo_mes = analise.fatia_periodo(cubo, indice_cubo, ano, mes)
+    # O template dos gráficos é montado uma vez por processo; fica fora da medição
+    figuras.template_iga()
+    frequentes = registrar('visitantes frequentes', lambda: analise.calcular_visitantes_frequentes(
+        df_mes, analise.LIMIAR_VISITAS_FREQUENTES
+    ))
+    # Figuras montadas sem o cache do dashboard
+    registrar('gráficos', lambda: [
+        figuras.montar_figura('top_empresas', *analise.dados_top_empresas(cubo_mes)),
+        figuras.montar_figura('por_data', *analise.dados_convidados_por_data(cubo_mes)),
+        figuras.montar_figura('por_dia_semana', *analise.dados_convidados_por_dia_semana(cubo_mes)),
+        figuras.montar_figura('consolidado', *(analise.dados_consolidado(frequentes) or ((), ())))
+    ])
+    metricas = analise.metricas_periodo(resumo, ano, mes)
+    graficos = analise.graficos_relatorio(cubo_mes, cubo_mes, frequentes)
+    subtitulo = analise.subtitulo_relatorio((ano, mes), 'Todos', None)
+    registrar('gerar pptx', lambda: relatorio.gerar_pptx('Dashboard de Visitas', subtitulo, metricas, graficos))
+    return resultados
+
+# =====================
+# Relatório e comparação com uma execução de referência
+# =====================
+def imprimir_resultados(resultados):
+    print(f"{'linhas':>10}  {'etapa':<24}{'tempo (s)':>12}{'pico (MB)':>12}")
+    for r in resultados:
+        pico = f"{r['pico_mb']:12.1f}" if r['pico_mb'] is not None else f"{'-':>12}"
+        print(f"{r['linhas']:>10}  {r['etapa']:<24}{r['tempo_s']:12.3f}{pico}")
+
+def comparar_com_referencia(resultados, referencia, tolerancia):
+    anteriores = {(r['linhas'], r['etapa']): r for r in referencia}
+    regressoes = []
+    for r in resultados:
+        anterior = anteriores.get((r['linhas'], r['etapa']))
+        if anterior is None:
+            continue
+        # Etapas muito rápidas oscilam demais para serem comparadas
+        if r['tempo_s'] > 0.05 and r['tempo_s'] > anterior['tempo_s'] * tolerancia:
+            regressoes.append(f"{r['linhas']} linhas / {r['etapa']}: tempo {anterior['tempo_s']:.3f}s -> {r['tempo_s']:.3f}s")
+        if r['pico_mb'] and anterior.get('pico_mb') and r['pico_mb'] > anterior['pico_mb'] * tolerancia:
+            regressoes.append(f"{r['linhas']} linhas / {r['etapa']}: memória {anterior['pico_mb']:.1f}MB -> {r['pico_mb']:.1f}MB")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das etapas do Dashboard de Visitas com dados sintéticos')
+    parser.add_argument('--linhas', default='10000,100000,1000000', help='Tamanhos a medir, separados por vírgula')
+    parser.add_argument('--max-linhas-excel', type=int, default=100000, help='Maior tamanho para o qual a leitura de .xlsx é medida')
+    parser.add_argument('--sem-memoria', action='store_true', help='Não mede o pico de memória (execução mais rápida)')
+    parser.add_argument('--processos', type=int, default=min(4, os.cpu_count() or 1), help='Processos da leitura de .xlsx em paralelo')
+    parser.add_argument('--saida', help='Arquivo JSON onde salvar os resultados')
+    parser.add_argument('--referencia', help='Arquivo JSON de uma execução anterior para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=1.5, help='Fator de piora aceito em relação à referência')
+    args = parser.parse_args()
+
+    # Snapshots em diretório temporário, removido ao final
+    snapshots.DIRETORIO_SNAPSHOTS = tempfile.mkdtemp(prefix='dash_benchmark_')
+    pool = ProcessPoolExecutor(max_workers=args.processos, mp_context=multiprocessing.get_context('spawn'))
+    resultados = []
+    try:
+        for linhas in [int(valor) for valor in args.linhas.split(',')]:
+            resultados += executar_etapas(linhas, not args.sem_memoria, args.max_linhas_excel, pool, args.processos)
+    finally:
+        pool.shutdown()
+        shutil.rmtree(snapshots.DIRETORIO_SNAPSHOTS, ignore_errors=True)
+    imprimir_resultados(resultados)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+
+    if args.referencia:
+        with open(args.referencia, encoding='utf-8') as arquivo:
+            regressoes = comparar_com_referencia(resultados, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            print('\nRegressões encontradas:')
+            for regressao in regressoes:
+                print(f'  {regressao}')
+            sys.exit(1)
+        print('\nNenhuma regressão em relação à referência.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import functools
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Calendário de dias úteis do Cubo (cidade de São Paulo), sem dependência do Streamlit nem de
+# serviços externos: segunda a sexta, menos os feriados nacionais, estaduais e municipais.
+# As contagens usam as funções de dias úteis do numpy (vetorizadas)
+
+# Feriados de data fixa: (mês, dia) -> nome
+FERIADOS_FIXOS = {
+    (1, 1): 'Confraternização Universal',
+    (1, 25): 'Aniversário de São Paulo',
+    (4, 21): 'Tiradentes',
+    (5, 1): 'Dia do Trabalho',
+    (7, 9): 'Revolução Constitucionalista',
+    (9, 7): 'Independência do Brasil',
+    (10, 12): 'Nossa Senhora Aparecida',
+    (11, 2): 'Finados',
+    (11, 15): 'Proclamação da República',
+    (11, 20): 'Dia da Consciência Negra',
+    (12, 25): 'Natal'
+}
+
+# Feriados móveis: dias em relação ao domingo de Páscoa -> nome.
+# Carnaval é ponto facultativo, mas sem expediente bancário
+FERIADOS_MOVEIS = {
+    -48: 'Carnaval',
+    -47: 'Carnaval',
+    -2: 'Sexta-feira Santa',
+    60: 'Corpus Christi'
+}
+
+# =====================
+# Feriados
+# =====================
+def pascoa(ano):
+    # Algoritmo de Meeus/Jones/Butcher (calendário gregoriano)
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+def feriados_do_ano(ano):
+    feriados = {date(ano, mes, dia): nome for (mes, dia), nome in FERIADOS_FIXOS.items()}
+    domingo = pascoa(ano)
+    feriados.update({domingo + timedelta(days=desvio): nome for desvio, nome in FERIADOS_MOVEIS.items()})
+    return feriados
+
+@functools.lru_cache(maxsize=8)
+def calendario(ano_inicial, ano_final):
+    # Montado uma vez por faixa de anos e reaproveitado por todas as contagens
+    feriados = [dia for ano in range(ano_inicial, ano_final + 1) for dia in feriados_do_ano(ano)]
+    return np.busdaycalendar(weekmask='1111100', holidays=np.array(feriados, dtype='datetime64[D]'))
+
+def para_dias(datas):
+    # Datas (Series, DatetimeIndex, Timestamp) -> datetime64 com resolução de dia
+    return np.asarray(datas, dtype='datetime64[ns]').astype('datetime64[D]')
+
+def calendario_das_datas(dias):
+    # Calendário com os feriados de todos os anos das datas (sem NaT)
+    anos = dias.astype('datetime64[Y]').astype(int) + 1970
+    return calendario(int(anos.min()), int(anos.max()))
+
+# =====================
+# Dias úteis
+# =====================
+def eh_dia_util(datas):
+    # Datas inválidas (NaT) não são dias úteis
+    dias = para_dias(datas)
+    validos = ~np.isnat(dias)
+    uteis = np.zeros(dias.shape, dtype=bool)
+    if validos.any():
+        uteis[validos] = np.is_busday(dias[validos], busdaycal=calendario_das_datas(dias[validos]))
+    return uteis
+
+def contar_dias_uteis(inicio, fim):
+    # Dias úteis de inicio a fim, inclusive
+    inicio, fim = para_dias(pd.Timestamp(inicio)), para_dias(pd.Timestamp(fim))
+    if fim < inicio:
+        return 0
+    return int(np.busday_count(inicio, fim + 1, busdaycal=calendario_das_datas(np.array([inicio, fim]))))
+
+def dias_uteis_por_mes(primeira, ultima):
+    # Dias úteis de cada mês de primeira a ultima (Series indexada por Ano e Mês). Os meses
+    # parciais, no início e no fim dos dados, contam só os dias cobertos
+    indice = pd.MultiIndex.from_arrays([[], []], names=['Ano', 'Mês'])
+    if pd.isna(primeira) or pd.isna(ultima):
+        return pd.Series([], index=indice, dtype=int)
+    meses = pd.period_range(primeira, ultima, freq='M')
+    primeira, ultima = para_dias(pd.Timestamp(primeira)), para_dias(pd.Timestamp(ultima))
+    inicios = np.maximum(para_dias(meses.start_time), primeira)
+    fins = np.minimum(para_dias(meses.end_time), ultima) + 1
+    contagens = np.busday_count(inicios, fins, busdaycal=calendario_das_datas(np.array([primeira, ultima])))
+    return pd.Series(contagens, index=pd.MultiIndex.from_arrays([meses.year, meses.month], names=['Ano', 'Mês']))
@@ -0,0 +1,156 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from analise import (
+    FILTROS_NOTIFICACAO,
+    LIMIAR_VISITAS_FREQUENTES,
+    TITULO_RELATORIO,
+    calcular_resumo_metricas,
+    calcular_visitantes_frequentes,
+    construir_cubo,
+    construir_indice_periodos,
+    fatia_periodo,
+    especificacoes_lote,
+    graficos_relatorio,
+    metricas_periodo,
+    nome_arquivo_empresa,
+    subtitulo_relatorio
+)
+from ingestao import detectar_formato, mesclar_partes
+from relatorio import exportar_zip, gerar_pptx
+from snapshots import chave_arquivo, chave_lote, ler_com_snapshots, ler_snapshot, salvar_snapshot
+
+# Modo em lote, sem Streamlit: lê as exportações de convites, calcula os mesmos agregados do
+# dashboard e grava JSON/Parquet (e, opcionalmente, os PPTX). Com --aquecer, deixa os snapshots
+# prontos para que o dashboard abra os mesmos arquivos sem ler as planilhas
+
+# Exportações em texto (tabulação), como os dados colados no dashboard
+EXTENSOES_TEXTO = ('.csv', '.tsv', '.txt')
+
+# =====================
+# Leitura: mesmas chaves do dashboard, para compartilhar os snapshots
+# =====================
+def abrir_arquivo(caminho):
+    with open(caminho, 'rb') as origem:
+        arquivo = io.BytesIO(origem.read())
+    formato = 'csv' if caminho.lower().endswith(EXTENSOES_TEXTO) else detectar_formato(arquivo)
+    return arquivo, formato
+
+def carregar_arquivos(caminhos, pool, processos, aquecer):
+    itens = {}
+    for caminho in caminhos:
+        arquivo, formato = abrir_arquivo(caminho)
+        itens.setdefault(chave_arquivo(arquivo, formato), (arquivo, formato))
+    chaves = sorted(itens)
+    if len(chaves) == 1:
+        return ler_com_snapshots([(chaves[0],) + itens[chaves[0]]], pool, processos, aquecer)[0]
+    chave = chave_lote(chaves)
+    df = ler_snapshot(chave)
+    if df is None:
+        df = mesclar_partes(ler_com_snapshots([(c,) + itens[c] for c in chaves], pool, processos, aquecer))
+        if aquecer:
+            salvar_snapshot(df, chave)
+    return df
+
+# =====================
+# Agregados: métricas, dados dos gráficos e visitantes frequentes por período e filtro
+# =====================
+def calcular_agregados(df, indice, cubo, indice_cubo, resumo, limiar):
+    periodos = []
+    frequentes_periodos = []
+    for (ano, mes, filtro), (inicio, fim) in sorted(indice.items()):
+        df_periodo = df.iloc[inicio:fim]
+        cubo_periodo = fatia_periodo(cubo, indice_cubo, ano, mes, filtro)
+        frequentes = calcular_visitantes_frequentes(df_periodo[['Cliente', 'E-mail']], limiar)
+        periodos.append({
+            'ano': int(ano),
+            'mes': int(mes),
+            'filtro': filtro,
+            'metricas': metricas_periodo(resumo, ano, mes, filtro),
+            'graficos': graficos_relatorio(cubo_periodo, cubo_periodo, frequentes),
+            'visitantes_frequentes': frequentes.to_dict('records')
+        })
+        frequentes_periodos.append(frequentes.assign(Ano=int(ano), Mês=int(mes), Filtro=filtro))
+    return periodos, frequentes_periodos
+
+def gravar_agregados(saida, df, resumo, periodos, frequentes_periodos, limiar):
+    with open(os.path.join(saida, 'agregados.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump({
+            'linhas': len(df),
+            'limiar_visitas_frequentes': limiar,
+            'periodos': periodos
+        }, arquivo, ensure_ascii=False, indent=2, default=int)
+    resumo.reset_index().to_parquet(os.path.join(saida, 'resumo_metricas.parquet'), index=False)
+    frequentes = pd.concat(frequentes_periodos, ignore_index=True) if frequentes_periodos else pd.DataFrame()
+    frequentes.to_parquet(os.path.join(saida, 'visitantes_frequentes.parquet'), index=False)
+
+# =====================
+# Relatórios: um deck por mês (filtro escolhido) e, opcionalmente, o zip de todas as empresas
+# =====================
+def gravar_relatorios_mensais(saida, periodos, filtro):
+    for periodo in periodos:
+        if periodo['filtro'] != filtro:
+            continue
+        ano, mes = periodo['ano'], periodo['mes']
+        subtitulo = subtitulo_relatorio((ano, mes), filtro, None)
+        conteudo = gerar_pptx(TITULO_RELATORIO, subtitulo, periodo['metricas'], periodo['graficos'])
+        nome = f'{ano}-{mes:02d}_{nome_arquivo_empresa(filtro)}.pptx'
+        with open(os.path.join(saida, nome), 'wb') as arquivo:
+            arquivo.write(conteudo)
+
+def gravar_lote(saida, df, indice, cubo, indice_cubo, resumo, filtro, limiar, pool, processos):
+    especificacoes = especificacoes_lote(df, indice, cubo, indice_cubo, resumo, filtro, limiar)
+    exportar_zip(especificacoes, os.path.join(saida, f'relatorios_cubo_{nome_arquivo_empresa(filtro)}.zip'), pool, processos)
+
+def medir(etapa, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    print(f'{etapa:<28}{time.perf_counter() - inicio:10.3f}s')
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description='Agregados e relatórios do Dashboard de Visitas sem o Streamlit')
+    parser.add_argument('arquivos', nargs='+', help='Exportações de convites (.xlsx, .xls, .xlsm, .xlsb ou texto com tabulação)')
+    parser.add_argument('--saida', required=True, help='Diretório onde gravar os agregados e relatórios')
+    parser.add_argument('--filtro', default='Todos', choices=list(FILTROS_NOTIFICACAO), help='Filtro de notificação dos relatórios')
+    parser.add_argument('--limiar', type=int, default=LIMIAR_VISITAS_FREQUENTES, help='Visitas no mês a partir das quais um visitante é frequente')
+    parser.add_argument('--pptx', action='store_true', help='Gera um relatório em PPTX por mês')
+    parser.add_argument('--lote', action='store_true', help='Gera o zip com os relatórios de todos os meses e empresas')
+    parser.add_argument('--aquecer', action='store_true', help='Grava os snapshots usados pelo dashboard')
+    parser.add_argument('--processos', type=int, default=min(4, os.cpu_count() or 1), help='Processos para leitura e geração dos relatórios')
+    args = parser.parse_args()
+
+    os.makedirs(args.saida, exist_ok=True)
+    pool = None
+    if args.processos > 1:
+        pool = ProcessPoolExecutor(max_workers=args.processos, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        df = medir('leitura', lambda: carregar_arquivos(args.arquivos, pool, args.processos, args.aquecer))
+        cubo = medir('cubo diário', lambda: construir_cubo(df))
+        indice_cubo = construir_indice_periodos(cubo)
+        resumo = medir('resumo de métricas', lambda: calcular_resumo_metricas(cubo))
+        indice = medir('índice de períodos', lambda: construir_indice_periodos(df))
+        periodos, frequentes_periodos = medir('agregados por período', lambda: calcular_agregados(
+            df, indice, cubo, indice_cubo, resumo, args.limiar
+        ))
+        medir('gravação dos agregados', lambda: gravar_agregados(args.saida, df, resumo, periodos, frequentes_periodos, args.limiar))
+        if args.pptx:
+            medir('relatórios mensais', lambda: gravar_relatorios_mensais(args.saida, periodos, args.filtro))
+        if args.lote:
+            medir('exportação em lote', lambda: gravar_lote(
+                args.saida, df, indice, cubo, indice_cubo, resumo, args.filtro, args.limiar, pool, args.processos
+            ))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    print(f'{len(df)} convites, {len(periodos)} períodos gravados em {args.saida}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from analise import CORES_IGA, GRAFICOS, cores_barras
+
+# Figuras (plotly) do dashboard, sem dependência do Streamlit: montadas a partir dos dados
+# já agregados de cada gráfico (tuplas x, y), os mesmos usados pelo relatório em PPTX
+
+# =====================
+# Template e títulos
+# =====================
+def titulo_html(texto):
+    return '<span style="font-family:Arial,sans-serif;font-size:26px;font-weight:bold;color:{};">{}</span>'.format(CORES_IGA['azul_escuro'], texto)
+
+def template_iga():
+    # Montado e validado uma única vez por processo; as figuras só referenciam o nome
+    if 'iga' not in pio.templates:
+        template = go.layout.Template(pio.templates['plotly'])
+        template.layout.update(
+            plot_bgcolor=CORES_IGA['cinza_claro'],
+            paper_bgcolor=CORES_IGA['cinza_claro'],
+            title=dict(x=0.5, xanchor='center', yanchor='top', pad=dict(t=10, b=0), font=dict(family='Arial', size=22)),
+            margin=dict(t=60, b=40, l=40, r=40),
+            xaxis=dict(automargin=True, title=None),
+            yaxis=dict(title=None)
+        )
+        template.data.bar = [go.Bar(textposition='outside')]
+        pio.templates['iga'] = template
+    return 'iga'
+
+# =====================
+# Gráficos de barras
+# =====================
+def montar_figura(tipo, x, y, uteis=None):
+    # tipo: chave de GRAFICOS; uteis (gráfico por dia): dias úteis, para destacar os demais
+    config = GRAFICOS[tipo]
+    titulo = titulo_html(config['nome']) if config['titulo_html'] else config['nome']
+    rotulo_x, rotulo_y = config['rotulos']
+    horizontal = tipo == 'consolidado'
+    barra = go.Bar(
+        x=list(y) if horizontal else list(x),
+        y=list(x) if horizontal else list(y),
+        text=list(y),
+        orientation='h' if horizontal else 'v',
+        marker_color=list(cores_barras(config['cor'], uteis)) if uteis is not None else config['cor'],
+        hovertemplate=f'{rotulo_x}=%{{x}}<br>{rotulo_y}=%{{y}}<extra></extra>'
+    )
+    fig = go.Figure(barra, layout=dict(template=template_iga(), title=dict(text=titulo)))
+    fig.update_layout(**config['layout'])
+    return fig
+
+def grafico_sem_dados(titulo):
+    return go.Figure(layout=dict(template=template_iga(), title=dict(text=titulo)))
@@ -0,0 +1,415 @@
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.worksheet._reader import WorkSheetParser
+from pandas.api.types import union_categoricals
+
+# Leitura e pré-processamento dos arquivos de convites, sem dependência do Streamlit:
+# usado pelo dashboard e pelos processos de leitura em paralelo
+
+NOMES_SEMANA = ['Segunda','Terça','Quarta','Quinta','Sexta','Sábado','Domingo']
+
+# Versão do pré-processamento: incrementar sempre que preprocessar_dados mudar,
+# para que os dados já em cache sejam processados novamente
+VERSAO_PREPROCESSAMENTO = 8
+
+# Colunas da planilha usadas pelo dashboard; as demais são descartadas na leitura
+COLUNAS_USADAS = ['Cliente', 'Data do Convite', 'Data de Cadastro', 'Anfitrião Notificado', 'E-mail']
+
+# Quantidade de linhas lidas e pré-processadas por vez na leitura em blocos
+TAMANHO_BLOCO = 50000
+
+# Menor faixa de linhas enviada a um processo de leitura: abaixo disso, o custo de
+# abrir a planilha em outro processo supera o ganho
+LINHAS_MIN_FAIXA = 20000
+
+# Assinaturas (primeiros bytes) dos formatos de planilha aceitos
+ASSINATURA_ZIP = b'PK\x03\x04'
+ASSINATURA_OLE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# =====================
+# Detecção do formato pelo conteúdo
+# =====================
+def detectar_formato(arquivo):
+    # Motor de leitura escolhido pelos primeiros bytes, em vez de tentar um motor e depois outro
+    posicao = arquivo.tell()
+    cabecalho = arquivo.read(len(ASSINATURA_OLE))
+    arquivo.seek(posicao)
+    if cabecalho.startswith(ASSINATURA_ZIP):
+        # .xlsb também é um zip, mas com a pasta de trabalho em formato binário
+        with zipfile.ZipFile(arquivo) as pacote:
+            binario = 'xl/workbook.bin' in pacote.namelist()
+        arquivo.seek(posicao)
+        return 'pyxlsb' if binario else 'openpyxl'
+    if cabecalho == ASSINATURA_OLE:
+        return 'xlrd'
+    raise ValueError('Formato não reconhecido: o arquivo não é uma planilha Excel (.xlsx, .xlsm, .xlsb ou .xls)')
+
+# =====================
+# Leitura completa de um arquivo
+# =====================
+def ler_arquivo(arquivo, formato):
+    # Aceita um caminho (usado pelos processos de leitura) ou um objeto de arquivo
+    if isinstance(arquivo, str):
+        with open(arquivo, 'rb') as fonte:
+            return ler_arquivo(fonte, formato)
+    arquivo.seek(0)
+    if formato == 'csv':
+        partes = preprocessar_blocos(ler_blocos_csv(arquivo))
+    elif formato == 'openpyxl':
+        partes = preprocessar_blocos(ler_blocos_excel(arquivo))
+    else:
+        partes = [preprocessar_bloco(ler_excel_completo(arquivo, formato))]
+    return juntar_partes(partes)
+
+def juntar_partes(partes):
+    # Partes vazias (ex.: abas só com cabeçalho) não entram na união das categorias
+    partes = [parte for parte in partes if len(parte)] or partes[:1]
+    return ordenar_dados(remover_convites_repetidos(concatenar_blocos(partes)))
+
+# =====================
+# Leitura em paralelo: o arquivo é dividido em partes independentes (abas e, nas abas
+# grandes, faixas de linhas), lidas cada uma em um processo
+# =====================
+def dividir_leitura(arquivo, formato, processos):
+    # Retorna os grupos de faixas (aba, primeira linha, última linha), um por tarefa do pool;
+    # None representa o arquivo inteiro, para os formatos que não podem ser divididos
+    # (CSV e Excel antigo)
+    if formato != 'openpyxl':
+        return [None]
+    arquivo.seek(0)
+    wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        # max_row vem da dimensão gravada na planilha, sem percorrer as linhas
+        abas = [(ws.title, ws.max_row) for ws, _, _ in abas_com_convites(wb)]
+    finally:
+        wb.close()
+    total = sum(linhas or 0 for _, linhas in abas)
+    tamanho = max(LINHAS_MIN_FAIXA, -(-total // processos))
+    faixas = []
+    for aba, linhas in abas:
+        inicios = list(range(2, (linhas or 0) + 1, tamanho))
+        # A última faixa vai até o fim da aba, caso a dimensão gravada esteja desatualizada
+        faixas += [((aba, inicio, inicio + tamanho - 1), tamanho) for inicio in inicios[:-1]]
+        ultima = inicios[-1] if inicios else 2
+        faixas.append(((aba, ultima, None), max((linhas or 0) - ultima + 1, 1)))
+    return agrupar_faixas(faixas, processos)
+
+def agrupar_faixas(faixas, processos):
+    # faixas: (faixa, linhas). Faixas seguidas, na ordem do arquivo, em até `processos` grupos
+    # de tamanho parecido: cada grupo abre a pasta de trabalho uma única vez
+    total = sum(linhas for _, linhas in faixas)
+    grupos = [[] for _ in range(processos)]
+    acumulado = 0
+    for faixa, linhas in faixas:
+        grupos[min(acumulado * processos // total, processos - 1)].append(faixa)
+        acumulado += linhas
+    return [tuple(grupo) for grupo in grupos if grupo]
+
+def ler_em_paralelo(itens, pool=None, processos=1):
+    # itens: (chave, arquivo, formato); retorna {chave: DataFrame pré-processado}.
+    # As abas e faixas de linhas de todos os arquivos dividem o mesmo pool
+    grupos = {}
+    if pool is not None and processos > 1:
+        grupos = {chave: dividir_leitura(arquivo, formato, processos) for chave, arquivo, formato in itens}
+    if sum(len(lista) for lista in grupos.values()) <= 1:
+        # Uma única parte (ou um único núcleo): ler no próprio processo evita copiar o arquivo
+        return {chave: ler_arquivo(arquivo, formato) for chave, arquivo, formato in itens}
+
+    # Os processos recebem o caminho de uma cópia em disco, e não o conteúdo:
+    # cada grupo lê apenas as abas de que precisa
+    with tempfile.TemporaryDirectory(prefix='dash_leitura_') as diretorio:
+        futuros = {}
+        for chave, arquivo, formato in itens:
+            caminho = os.path.join(diretorio, chave.split(':')[0])
+            with open(caminho, 'wb') as destino, arquivo.getbuffer() as buffer:
+                destino.write(buffer)
+            futuros[chave] = [pool.submit(ler_parte, caminho, formato, grupo) for grupo in grupos[chave]]
+        return {chave: juntar_partes([futuro.result() for futuro in lista]) for chave, lista in futuros.items()}
+
+def ler_parte(caminho, formato, faixas):
+    # Executada nos processos de leitura. A pasta de trabalho (e a tabela de textos
+    # compartilhados) é carregada uma vez para o grupo de faixas e fechada ao final:
+    # nada fica na memória do processo entre uma leitura e outra
+    if faixas is None:
+        return ler_arquivo(caminho, formato)
+    partes = []
+    # Aberta como objeto de arquivo: o openpyxl recusa caminhos sem extensão .xlsx
+    with open(caminho, 'rb') as fonte:
+        wb = openpyxl.load_workbook(fonte, read_only=True, data_only=True)
+        try:
+            for aba, inicio, fim in faixas:
+                ws = wb[aba]
+                posicoes, colunas = colunas_da_aba(ws)
+                partes += preprocessar_blocos(ler_blocos_faixa(ws, posicoes, colunas, inicio, fim))
+        finally:
+            wb.close()
+    return juntar_partes(partes)
+
+# =====================
+# Leitura em blocos: a memória fica limitada a um bloco de linhas brutas por vez
+# =====================
+def coluna_usada(nome):
+    return nome in COLUNAS_USADAS
+
+def ler_blocos_csv(arquivo):
+    return pd.read_csv(arquivo, sep='\t', usecols=coluna_usada, chunksize=TAMANHO_BLOCO)
+
+def ler_blocos_excel(arquivo):
+    # Modo read_only do openpyxl: as linhas são lidas sob demanda, sem carregar a planilha inteira
+    wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        for ws, posicoes, colunas in abas_com_convites(wb):
+            yield from ler_blocos_faixa(ws, posicoes, colunas, 2, None)
+    finally:
+        wb.close()
+
+def colunas_da_aba(ws):
+    cabecalho = next(ws.iter_rows(max_row=1, values_only=True), None) or ()
+    posicoes = [i for i, nome in enumerate(cabecalho) if coluna_usada(nome)]
+    return posicoes, [cabecalho[i] for i in posicoes]
+
+def abas_com_convites(wb):
+    # Abas com as mesmas colunas da primeira aba que tem a data do convite
+    # (abas de resumo ou anotações na mesma pasta de trabalho são ignoradas)
+    abas = []
+    for ws in wb.worksheets:
+        posicoes, colunas = colunas_da_aba(ws)
+        if 'Data do Convite' in colunas and (not abas or set(colunas) == set(abas[0][2])):
+            abas.append((ws, posicoes, colunas))
+    if not abas:
+        raise ValueError("Nenhuma aba da planilha tem a coluna 'Data do Convite'")
+    return abas
+
+def ler_blocos_faixa(ws, posicoes, colunas, inicio, fim):
+    bloco = []
+    vazia = True
+    for valores in linhas_da_faixa(ws, inicio, fim):
+        bloco.append([valores.get(i + 1) for i in posicoes])
+        if len(bloco) >= TAMANHO_BLOCO:
+            yield pd.DataFrame(bloco, columns=colunas)
+            bloco = []
+            vazia = False
+    if bloco or vazia:
+        yield pd.DataFrame(bloco, columns=colunas)
+
+def linhas_da_faixa(ws, inicio, fim):
+    # Valores de cada linha como {número da coluna: valor}
+    with ws._get_source() as fonte:
+        trecho = pular_ate_linha(fonte, inicio)
+        if trecho is None:
+            # Linhas sem o atributo r (gravadas por alguns programas): leitura comum
+            for linha in ws.iter_rows(min_row=inicio, max_row=fim, values_only=True):
+                yield dict(enumerate(linha, 1))
+            return
+        parser = WorkSheetParser(trecho, ws._shared_strings, data_only=True,
+                                 epoch=ws.parent.epoch, date_formats=ws.parent._date_formats)
+        for numero, celulas in parser.parse():
+            if fim is not None and numero > fim:
+                break
+            yield {celula['column']: celula['value'] for celula in celulas}
+
+def pular_ate_linha(fonte, inicio, tamanho_leitura=1 << 22):
+    # O openpyxl converte todas as células até chegar à linha pedida; aqui as linhas
+    # anteriores são descartadas ainda como bytes, procurando a tag da linha no XML.
+    # Retorna o cabeçalho do XML da aba seguido do restante a partir da linha inicial
+    abertura = b'<sheetData>'
+    marcador = b'<row r="%d"' % inicio
+    buffer = b''
+    cabecalho = None
+    while True:
+        dados = fonte.read(tamanho_leitura)
+        buffer += dados
+        if cabecalho is None:
+            posicao = buffer.find(abertura)
+            if posicao >= 0:
+                cabecalho = buffer[:posicao + len(abertura)]
+                buffer = buffer[posicao + len(abertura):]
+        if cabecalho is not None:
+            posicao = buffer.find(marcador)
+            if posicao >= 0:
+                return LeitorTrecho(cabecalho + buffer[posicao:], fonte)
+            # A tag pode estar dividida entre duas leituras
+            buffer = buffer[-len(marcador):]
+        if not dados:
+            return None
+
+class LeitorTrecho:
+    # Objeto de arquivo mínimo para o parser: bytes já lidos seguidos do restante da fonte
+    def __init__(self, inicio, fonte):
+        self.inicio = inicio
+        self.fonte = fonte
+
+    def read(self, tamanho=-1):
+        if not self.inicio:
+            return self.fonte.read(tamanho)
+        if tamanho is None or tamanho < 0:
+            dados, self.inicio = self.inicio + self.fonte.read(), b''
+        else:
+            dados, self.inicio = self.inicio[:tamanho], self.inicio[tamanho:]
+        return dados
+
+def ler_excel_completo(arquivo, formato):
+    # Excel 97-2003 (xlrd) e binário (pyxlsb): sem leitura em blocos; as abas são
+    # escolhidas pelo mesmo critério da leitura com openpyxl
+    abas = pd.read_excel(arquivo, engine=formato, sheet_name=None, usecols=coluna_usada)
+    selecionadas = []
+    for df in abas.values():
+        colunas = set(df.columns)
+        if 'Data do Convite' in colunas and (not selecionadas or colunas == set(selecionadas[0].columns)):
+            selecionadas.append(df)
+    if not selecionadas:
+        raise ValueError("Nenhuma aba da planilha tem a coluna 'Data do Convite'")
+    return pd.concat(selecionadas, ignore_index=True)
+
+def preprocessar_blocos(blocos):
+    return [preprocessar_bloco(bloco) for bloco in blocos]
+
+def concatenar_blocos(partes):
+    if len(partes) == 1:
+        return partes[0]
+    # Categorias diferentes entre os blocos são unidas sem passar por strings
+    colunas = partes[0].columns
+    categoricas = [col for col in colunas if isinstance(partes[0][col].dtype, pd.CategoricalDtype)]
+    df = pd.concat([parte.drop(columns=categoricas) for parte in partes], ignore_index=True)
+    for col in categoricas:
+        df[col] = union_categoricals([parte[col] for parte in partes])
+    # Grafias de uma mesma empresa vindas de blocos diferentes
+    if 'Cliente' in categoricas:
+        df['Cliente'] = unificar_grafias(df['Cliente'])
+    return df[colunas]
+
+# =====================
+# União de vários arquivos: exportações sobrepostas não duplicam convites
+# =====================
+def mesclar_partes(partes):
+    if len(partes) == 1:
+        return partes[0]
+    # Cada linha é numerada entre as suas repetições dentro do próprio arquivo; após a
+    # união, uma linha aparece tantas vezes quanto no arquivo em que mais se repete
+    colunas = [col for col in COLUNAS_USADAS if all(col in parte.columns for parte in partes)]
+    numeradas = [
+        parte.assign(_ocorrencia=parte.groupby(colunas, observed=True, dropna=False, sort=False).cumcount())
+        for parte in partes
+    ]
+    df = concatenar_blocos(numeradas)
+    df = df.drop_duplicates(subset=colunas + ['_ocorrencia']).drop(columns='_ocorrencia')
+    # O mesmo convite em arquivos diferentes, mesmo com outras colunas alteradas, conta uma vez
+    return ordenar_dados(remover_convites_repetidos(df))
+
+# =====================
+# Função de pré-processamento
+# =====================
+def mapear_valores_unicos(serie, funcao):
+    # Aplica a transformação só aos valores distintos e expande de volta pelos códigos
+    # (as colunas repetem poucos valores em muitas linhas)
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    transformados = funcao(pd.Series(unicos, dtype=object))
+    return pd.Series(transformados.to_numpy().take(codigos), index=serie.index)
+
+def limpar_cliente(valores):
+    return valores.astype(str).str.replace(r'^\d+\s*-\s*', '', regex=True).str.replace(r'\s+', ' ', regex=True).str.strip()
+
+def unificar_grafias(categorico):
+    # Categorias que diferem só em maiúsculas/minúsculas (ex.: 'Empresa X' e 'EMPRESA X') passam
+    # a ser uma só, com a grafia mais frequente; apenas as categorias e os códigos são remapeados
+    categorias = categorico.cat.categories
+    grupos, unicas = pd.factorize(categorias.str.casefold())
+    if len(unicas) == len(categorias):
+        return categorico
+    codigos = categorico.cat.codes.to_numpy()
+    frequencia = np.bincount(codigos[codigos >= 0], minlength=len(categorias))
+    # Ordenado por grupo e, dentro dele, da grafia mais frequente para a menos (empate: a primeira)
+    ordem = np.lexsort((-frequencia, grupos))
+    escolhidas = ordem[np.unique(grupos[ordem], return_index=True)[1]]
+    codigos = np.where(codigos >= 0, grupos.take(codigos), -1)
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=categorias[escolhidas]), index=categorico.index)
+
+def extrair_data_convite(valores):
+    # Ex: '30/04/2025 (18:00 às 19:00)' -> 30/04/2025
+    texto = valores.astype(str).str.extract(r'(\d{2}/\d{2}/\d{4})', expand=False)
+    return pd.to_datetime(texto, format='%d/%m/%Y', errors='coerce')
+
+def converter_data(valores):
+    return pd.to_datetime(valores, errors='coerce', dayfirst=True)
+
+def normalizar_texto(valores):
+    return valores.str.strip().str.lower()
+
+def normalizar_email(valores):
+    # Identidade do visitante: sem maiúsculas, espaços e prefixo 'mailto:', e sem o sufixo
+    # '+alias' (joao+cubo@x.com é a mesma caixa que joao@x.com); e-mail em branco fica vazio
+    emails = normalizar_texto(valores).str.replace(r'^mailto:', '', regex=True)
+    emails = emails.str.replace(r'\+[^@]*@', '@', regex=True)
+    return emails.where(emails != '')
+
+def preprocessar_dados(df):
+    return ordenar_dados(remover_convites_repetidos(preprocessar_bloco(df)))
+
+def preprocessar_bloco(df):
+    # Limpeza da coluna Cliente
+    # Cliente e E-mail como códigos inteiros sobre um dicionário de valores distintos (categorias),
+    # normalizados uma única vez: contagens e agrupamentos usam só os códigos
+    if 'Cliente' in df.columns:
+        df['Cliente'] = unificar_grafias(mapear_valores_unicos(df['Cliente'], limpar_cliente).astype('category'))
+    
+    # Extrair apenas a data da coluna 'Data do Convite' (ex: '30/04/2025 (18:00 às 19:00)' -> '30/04/2025')
+    if 'Data do Convite' in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df['Data do Convite']):
+            df['Data do Convite'] = df['Data do Convite'].dt.normalize()
+        else:
+            df['Data do Convite'] = mapear_valores_unicos(df['Data do Convite'], extrair_data_convite)
+    
+    # Conversão da data de cadastro
+    if 'Data de Cadastro' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Data de Cadastro']):
+        df['Data de Cadastro'] = mapear_valores_unicos(df['Data de Cadastro'], converter_data)
+    
+    # Remover linhas com datas inválidas
+    df = df.dropna(subset=['Data do Convite'])
+    
+    # Colunas de baixa cardinalidade como categorias, com a flag de notificação normalizada uma única vez
+    if 'Anfitrião Notificado' in df.columns:
+        df['Anfitrião Notificado'] = df['Anfitrião Notificado'].astype('category')
+        df['Notificado'] = mapear_valores_unicos(df['Anfitrião Notificado'], normalizar_texto).astype('category')
+    if 'E-mail' in df.columns:
+        df['E-mail'] = mapear_valores_unicos(df['E-mail'], normalizar_email).astype('category')
+    
+    # Extrair dia da semana, mês, ano da Data do Convite
+    if 'Data do Convite' in df.columns:
+        # Garantir que o dia da semana é calculado pela data
+        df['Dia da Semana'] = df['Data do Convite'].dt.dayofweek
+        df['Dia da Semana Nome'] = pd.Categorical.from_codes(
+            df['Dia da Semana'].to_numpy(), categories=NOMES_SEMANA, ordered=True
+        )
+        df['Ano'] = df['Data do Convite'].dt.year
+        df['Mês'] = df['Data do Convite'].dt.month
+        df['Dia'] = df['Data do Convite'].dt.day
+    
+    return df
+
+def remover_convites_repetidos(df):
+    # Um convite por (visitante, data, empresa): linhas repetidas (ex.: o mesmo convite enviado
+    # duas vezes) contam uma vez, e a primeira é mantida. A chave inteira combina o dia e os
+    # códigos de Cliente e E-mail, e as repetições são achadas por tabela hash, em tempo linear.
+    # Linhas sem e-mail (código -1, deslocado para 0) não identificam o visitante e são todas mantidas
+    if df.empty or not {'E-mail', 'Cliente', 'Data do Convite'} <= set(df.columns):
+        return df
+    emails = df['E-mail'].cat.codes.to_numpy().astype(np.int64) + 1
+    clientes = df['Cliente'].cat.codes.to_numpy().astype(np.int64) + 1
+    dias = df['Data do Convite'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    dias -= dias.min()
+    chaves = (dias * (len(df['Cliente'].cat.categories) + 1) + clientes) * (len(df['E-mail'].cat.categories) + 1) + emails
+    repetidos = pd.Series(chaves).duplicated().to_numpy() & (emails > 0)
+    if not repetidos.any():
+        return df
+    return df[~repetidos]
+
+def ordenar_dados(df):
+    # Ordena por período e notificação: cada mês (e cada filtro dentro do mês)
+    # passa a ser um intervalo contíguo de linhas, usado pelo índice de períodos
+    colunas_ordem = [col for col in ['Ano', 'Mês', 'Notificado', 'Data do Convite'] if col in df.columns]
+    return df.sort_values(colunas_ordem, kind='stable').reset_index(drop=True)
@@ -0,0 +1,207 @@
+import io
+import threading
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.dml.color import RGBColor
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.enum.text import PP_ALIGN
+from pptx.util import Inches, Pt
+
+# Relatório em PPTX do dashboard, sem dependência do Streamlit: recebe as métricas e os
+# dados já agregados de cada gráfico (tuplas pequenas), nunca o DataFrame completo
+
+AZUL_ESCURO = (0, 51, 102)  # RGB do Itaú
+
+# Exportação em lote: decks por tarefa e tarefas em andamento por processo. Tarefas pequenas,
+# enviadas aos poucos, deixam o pool livre para outros usos (ex.: leitura de arquivos de outras sessões)
+DECKS_POR_TAREFA = 8
+TAREFAS_POR_PROCESSO = 2
+
+# Cards do primeiro slide: (rótulo, chave em metricas)
+CARDS = [
+    ('Total de Convites', 'total_convites'),
+    ('Anfitriões Notificados', 'anfitrioes_notificados'),
+    ('Não Notificados', 'anfitrioes_nao_notificados'),
+    ('Convidados Cubo', 'total_convidados_cubo'),
+    ('Média por Dia Útil', 'media_convidados_dia_util')
+]
+
+# =====================
+# Montagem do PPTX
+# =====================
+def gerar_pptx(titulo, subtitulo, metricas, graficos):
+    # graficos: dicts com titulo, cor (hex), cores (por barra, opcional), horizontal, x e y;
+    # um slide por gráfico.
+    # Os gráficos são nativos do PowerPoint (editáveis), sem renderizar imagens
+    prs = Presentation()
+    adicionar_slide_resumo(prs, titulo, subtitulo, metricas)
+    for grafico in graficos:
+        adicionar_slide_grafico(prs, grafico, subtitulo)
+    output = io.BytesIO()
+    prs.save(output)
+    return output.getvalue()
+
+def adicionar_slide_resumo(prs, titulo, subtitulo, metricas):
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = titulo
+    left = Inches(0.2)
+    top = Inches(2.2)
+    width = Inches(1.8)
+    height = Inches(0.7)
+    # Adiciona cards
+    for i, (label, chave) in enumerate(CARDS):
+        txBox = slide.shapes.add_textbox(left + Inches(i*1.95), top, width, height)
+        tf = txBox.text_frame
+        tf.clear()
+        tf.word_wrap = True
+        p = tf.paragraphs[0]
+        p.text = label
+        p.font.size = Pt(12)
+        p.font.bold = True
+        p.font.color.rgb = RGBColor(*AZUL_ESCURO)
+        p.alignment = PP_ALIGN.CENTER
+        p2 = tf.add_paragraph()
+        p2.text = str(metricas[chave])
+        p2.font.size = Pt(28)
+        p2.font.bold = True
+        p2.font.color.rgb = RGBColor(*AZUL_ESCURO)
+        p2.alignment = PP_ALIGN.CENTER
+    adicionar_subtitulo(slide, subtitulo)
+
+def adicionar_slide_grafico(prs, grafico, subtitulo):
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = grafico['titulo']
+    if not len(grafico['x']):
+        # O PowerPoint não aceita gráfico sem categorias (ex.: filtro só com linhas do Cubo)
+        adicionar_sem_dados(slide)
+        adicionar_subtitulo(slide, subtitulo)
+        return
+    dados = CategoryChartData()
+    dados.categories = grafico['x']
+    dados.add_series(grafico['titulo'], grafico['y'])
+    tipo = XL_CHART_TYPE.BAR_CLUSTERED if grafico['horizontal'] else XL_CHART_TYPE.COLUMN_CLUSTERED
+    chart = slide.shapes.add_chart(tipo, Inches(0.4), Inches(1.6), Inches(9.2), Inches(5.2), dados).chart
+    chart.has_legend = False
+    plot = chart.plots[0]
+    plot.gap_width = 60
+    plot.has_data_labels = True
+    plot.data_labels.font.size = Pt(10)
+    serie = plot.series[0]
+    serie.format.fill.solid()
+    serie.format.fill.fore_color.rgb = RGBColor.from_string(grafico['cor'].lstrip('#'))
+    # Cores por barra (gráfico por dia: fins de semana e feriados destacados)
+    for i, cor in enumerate(grafico.get('cores') or ()):
+        if cor != grafico['cor']:
+            ponto = serie.points[i]
+            ponto.format.fill.solid()
+            ponto.format.fill.fore_color.rgb = RGBColor.from_string(cor.lstrip('#'))
+    chart.category_axis.tick_labels.font.size = Pt(10)
+    chart.value_axis.has_major_gridlines = False
+    chart.value_axis.tick_labels.font.size = Pt(10)
+    adicionar_subtitulo(slide, subtitulo)
+
+def adicionar_sem_dados(slide):
+    txBox = slide.shapes.add_textbox(Inches(0.4), Inches(3.6), Inches(9.2), Inches(0.6))
+    p = txBox.text_frame.paragraphs[0]
+    p.text = 'Sem dados para exibir'
+    p.font.size = Pt(20)
+    p.font.color.rgb = RGBColor(*AZUL_ESCURO)
+    p.alignment = PP_ALIGN.CENTER
+
+def adicionar_subtitulo(slide, subtitulo):
+    txBox = slide.shapes.add_textbox(Inches(0.4), Inches(1.1), Inches(9.2), Inches(0.4))
+    p = txBox.text_frame.paragraphs[0]
+    p.text = subtitulo
+    p.font.size = Pt(14)
+    p.font.color.rgb = RGBColor(*AZUL_ESCURO)
+    p.alignment = PP_ALIGN.CENTER
+
+# =====================
+# Exportação em lote: vários decks gerados em paralelo e entregues em um único zip
+# =====================
+def gerar_pptx_lote(especificacoes):
+    # Executada nos processos; várias apresentações por tarefa diluem o custo de comunicação.
+    # especificacoes: (nome do arquivo, argumentos de gerar_pptx)
+    return [(nome, gerar_pptx(*argumentos)) for nome, argumentos in especificacoes]
+
+def exportar_zip(especificacoes, destino, pool=None, processos=1, progresso=None):
+    # destino: caminho ou arquivo aberto. Os decks são gravados no zip à medida que ficam
+    # prontos, sem manter o lote inteiro em memória; progresso(gravados, total) é chamado
+    # a cada tarefa concluída
+    if pool is None or processos == 1:
+        tarefas = [[especificacao] for especificacao in especificacoes]
+        resultados = (gerar_pptx_lote(tarefa) for tarefa in tarefas)
+    else:
+        tarefas = [
+            especificacoes[i:i + DECKS_POR_TAREFA]
+            for i in range(0, len(especificacoes), DECKS_POR_TAREFA)
+        ]
+        resultados = enviar_aos_poucos(pool, gerar_pptx_lote, tarefas, processos * TAREFAS_POR_PROCESSO)
+    gravados = 0
+    # Sem compressão: o PPTX já é um zip comprimido
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_STORED) as pacote:
+        for arquivos in resultados:
+            for nome, conteudo in arquivos:
+                pacote.writestr(nome, conteudo)
+            gravados += len(arquivos)
+            if progresso is not None:
+                progresso(gravados, len(especificacoes))
+
+def enviar_aos_poucos(pool, funcao, tarefas, limite):
+    # No máximo `limite` tarefas no pool por vez; resultados na ordem das tarefas.
+    # Interrompida (ex.: erro ao gravar), cancela as tarefas que ainda não começaram
+    pendentes = deque()
+    try:
+        for tarefa in tarefas:
+            pendentes.append(pool.submit(funcao, tarefa))
+            if len(pendentes) >= limite:
+                yield pendentes.popleft().result()
+        while pendentes:
+            yield pendentes.popleft().result()
+    finally:
+        for futuro in pendentes:
+            futuro.cancel()
+
+# =====================
+# Geração em segundo plano, com os relatórios prontos guardados por chave
+# =====================
+class GeradorRelatorios:
+    def __init__(self, capacidade, threads=2, ao_descartar=None):
+        # capacidade: relatórios prontos mantidos em memória (LRU); ao_descartar(resultado):
+        # chamado para os relatórios descartados (ex.: remover o arquivo gravado)
+        self.capacidade = capacidade
+        self._ao_descartar = ao_descartar
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='relatorio')
+        self._relatorios = OrderedDict()
+        self._trava = threading.Lock()
+
+    def pedir(self, chave, funcao, *argumentos):
+        # Reaproveita um relatório pronto ou em andamento para a mesma chave;
+        # uma geração que falhou é refeita
+        with self._trava:
+            futuro = self._relatorios.get(chave)
+            if futuro is None or (futuro.done() and futuro.exception() is not None):
+                futuro = self._executor.submit(funcao, *argumentos)
+                self._relatorios[chave] = futuro
+            self._relatorios.move_to_end(chave)
+            self._descartar_excedentes()
+            return futuro
+
+    def obter(self, chave):
+        with self._trava:
+            futuro = self._relatorios.get(chave)
+            if futuro is not None:
+                self._relatorios.move_to_end(chave)
+            return futuro
+
+    def _descartar_excedentes(self):
+        # Relatórios ainda em geração não são descartados
+        prontos = [chave for chave, futuro in self._relatorios.items() if futuro.done()]
+        for chave in prontos[:max(len(self._relatorios) - self.capacidade, 0)]:
+            futuro = self._relatorios.pop(chave)
+            if self._ao_descartar is not None and futuro.exception() is None:
+                self._ao_descartar(futuro.result())
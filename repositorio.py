@@ -0,0 +1,110 @@
+import threading
+import weakref
+from collections import OrderedDict, deque
+
+# Repositório de conjuntos de dados compartilhado entre as sessões do servidor, sem
+# dependência do Streamlit: cada conteúdo (identificado pelo hash) fica uma única vez
+# na memória, e as sessões guardam apenas uma referência (ReferenciaDados) a ele
+
+class RepositorioDados:
+    def __init__(self, capacidade):
+        # capacidade: conjuntos mantidos em memória; os que estão em uso por alguma
+        # sessão nunca são descartados, mesmo acima da capacidade
+        self.capacidade = capacidade
+        self._dados = OrderedDict()
+        self._referencias = {}
+        self._carregando = {}
+        self._liberadas = deque()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        with self._trava:
+            self._aplicar_liberacoes()
+            if chave not in self._dados:
+                return None
+            self._dados.move_to_end(chave)
+            return self._referenciar(chave)
+
+    def carregar(self, chave, funcao):
+        # Sessões que pedem o mesmo conteúdo ao mesmo tempo esperam uma única leitura
+        with self._trava:
+            trava_chave = self._carregando.setdefault(chave, threading.Lock())
+        try:
+            with trava_chave:
+                referencia = self.obter(chave)
+                if referencia is None:
+                    df = funcao()
+                    if df is not None:
+                        referencia = self.registrar(chave, df)
+        finally:
+            with self._trava:
+                self._carregando.pop(chave, None)
+        return referencia
+
+    def registrar(self, chave, df):
+        with self._trava:
+            self._aplicar_liberacoes()
+            # Conteúdo já registrado por outra sessão: a cópia recebida é descartada
+            self._dados.setdefault(chave, df)
+            self._dados.move_to_end(chave)
+            referencia = self._referenciar(chave)
+            self._descartar_excedentes()
+            return referencia
+
+    def estatisticas(self):
+        with self._trava:
+            self._aplicar_liberacoes()
+            return {
+                'conjuntos': len(self._dados),
+                'em_uso': sum(1 for total in self._referencias.values() if total > 0),
+                'referencias': sum(self._referencias.values())
+            }
+
+    def _referenciar(self, chave):
+        self._referencias[chave] = self._referencias.get(chave, 0) + 1
+        return ReferenciaDados(self, chave)
+
+    def _liberar(self, chave):
+        # Chamado pelo finalizador da referência, que pode rodar durante a coleta de lixo em
+        # qualquer thread, inclusive em uma que já está com a trava: a chave só é enfileirada,
+        # sem esperar a trava. Com a trava ocupada, a liberação fica para a próxima operação
+        self._liberadas.append(chave)
+        if self._trava.acquire(blocking=False):
+            try:
+                self._aplicar_liberacoes()
+            finally:
+                self._trava.release()
+
+    def _aplicar_liberacoes(self):
+        # Chamado com a trava; conjuntos que ficaram sem referências podem ser descartados
+        if not self._liberadas:
+            return
+        while self._liberadas:
+            chave = self._liberadas.popleft()
+            self._referencias[chave] -= 1
+            if not self._referencias[chave]:
+                del self._referencias[chave]
+        self._descartar_excedentes()
+
+    def _descartar_excedentes(self):
+        # LRU: descarta os menos usados recentemente entre os que nenhuma sessão referencia
+        livres = [chave for chave in self._dados if chave not in self._referencias]
+        for chave in livres[:max(len(self._dados) - self.capacidade, 0)]:
+            del self._dados[chave]
+
+class ReferenciaDados:
+    # Guardada no session_state; ao ser descartada (nova carga ou fim da sessão),
+    # a contagem de referências do conjunto é decrementada
+    def __init__(self, repositorio, chave):
+        self.chave = chave
+        self._repositorio = repositorio
+        self._finalizador = weakref.finalize(self, repositorio._liberar, chave)
+
+    @property
+    def df(self):
+        # Enquanto a referência existe o conjunto não é descartado; visões filtradas
+        # (períodos, empresas) são calculadas a partir dele a cada execução, sem cópia
+        return self._repositorio._dados[self.chave]
+
+    def liberar(self):
+        self._finalizador()
@@ -0,0 +1,99 @@
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+from ingestao import VERSAO_PREPROCESSAMENTO, ler_em_paralelo
+
+# Snapshots em disco (Parquet) dos dados já pré-processados, sem dependência do Streamlit:
+# compartilhados pelo dashboard e pela linha de comando, que pode pré-aquecê-los
+DIRETORIO_SNAPSHOTS = os.environ.get(
+    'DASH_SNAPSHOTS',
+    os.path.join(os.path.expanduser('~'), '.dashboard_cubo', 'snapshots')
+)
+MAX_SNAPSHOTS = 20
+
+# =====================
+# Chaves: identificam o conteúdo dos arquivos (e de um conjunto de arquivos)
+# =====================
+def hash_conteudo(arquivo):
+    # Hash sobre o buffer do arquivo, sem copiar o conteúdo
+    with arquivo.getbuffer() as buffer:
+        return hashlib.sha1(buffer).hexdigest()
+
+def chave_arquivo(arquivo, formato):
+    return f'{hash_conteudo(arquivo)}:{formato}:v{VERSAO_PREPROCESSAMENTO}'
+
+def chave_lote(chaves):
+    return f"{hashlib.sha1(' '.join(sorted(chaves)).encode('utf-8')).hexdigest()}:lote:v{VERSAO_PREPROCESSAMENTO}"
+
+def chave_snapshot(caminho):
+    return os.path.basename(caminho)[:-len('.parquet')].replace('_', ':')
+
+# =====================
+# Snapshots em disco: formato colunar para reabrir os dados sem ler o Excel
+# =====================
+def caminho_snapshot(chave):
+    return os.path.join(DIRETORIO_SNAPSHOTS, chave.replace(':', '_') + '.parquet')
+
+def salvar_snapshot(df, chave):
+    # O snapshot é só uma otimização: falhas de escrita não impedem o uso dos dados
+    try:
+        os.makedirs(DIRETORIO_SNAPSHOTS, exist_ok=True)
+        caminho = caminho_snapshot(chave)
+        temporario = caminho + '.tmp'
+        df.to_parquet(temporario, engine='pyarrow', index=False)
+        os.replace(temporario, caminho)
+        limpar_snapshots_antigos()
+    except Exception:
+        pass
+
+def ler_snapshot(chave):
+    caminho = caminho_snapshot(chave)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        df = pd.read_parquet(caminho, engine='pyarrow', memory_map=True)
+    except Exception:
+        return None
+    # Atualiza a data de modificação para que o snapshot conte como o mais recente
+    os.utime(caminho)
+    return df
+
+def snapshots_disponiveis():
+    # Snapshots da versão atual do pré-processamento, do mais recente ao mais antigo
+    padrao = os.path.join(DIRETORIO_SNAPSHOTS, f'*_v{VERSAO_PREPROCESSAMENTO}.parquet')
+    return sorted(glob.glob(padrao), key=os.path.getmtime, reverse=True)
+
+def limpar_snapshots_antigos():
+    arquivos = sorted(
+        glob.glob(os.path.join(DIRETORIO_SNAPSHOTS, '*.parquet')),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    for caminho in arquivos[MAX_SNAPSHOTS:]:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+# =====================
+# Leitura com snapshots: arquivos já processados antes são reconhecidos pelo hash
+# =====================
+def ler_com_snapshots(itens, pool=None, processos=1, salvar=True):
+    # itens: (chave, arquivo, formato); apenas os arquivos sem snapshot são lidos
+    partes = {}
+    pendentes = []
+    for chave, arquivo, formato in itens:
+        df = ler_snapshot(chave)
+        if df is None:
+            pendentes.append((chave, arquivo, formato))
+        else:
+            partes[chave] = df
+    if pendentes:
+        for chave, df in ler_em_paralelo(pendentes, pool, processos).items():
+            partes[chave] = df
+            if salvar:
+                salvar_snapshot(df, chave)
+    return [partes[chave] for chave, _, _ in itens]